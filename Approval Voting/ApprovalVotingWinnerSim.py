@@ -1,9 +1,25 @@
 # Import dependencies
+import argparse
+import functools
+import os
+import sys
 import numpy as np
-import random
 from collections import defaultdict
 import csv
 
+# Make the Shared package importable no matter which folder the script is run from
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Shared.Accumulator import OutcomeAccumulator  # noqa: E402
+from Shared.Adaptive import INTERVALS, formatInterval  # noqa: E402
+from Shared.Approval import count_approval_winners  # noqa: E402
+from Shared.Cache import ResultCache  # noqa: E402
+from Shared.Cultures import cultureName, parseCulture  # noqa: E402
+from Shared.Journal import SweepJournal, resumeSweep  # noqa: E402
+from Shared.Profiles import approvalBits, batchSizes, generateApprovalProfiles  # noqa: E402
+from Shared.Profiling import PROFILE_ENV, PROFILER, phase, reportProfile  # noqa: E402
+from Shared.Results import resultBase, saveResults  # noqa: E402
+from Shared.Sweep import gridCells  # noqa: E402
+
 
 def has_unique_approval_winner(profile, num_alternatives):
     '''
@@ -28,77 +44,149 @@ def createAlternatives(num):
     return [str(i) for i in range(num)]
 
 
-def generateProfile(num_voters, alternatives):
+def generateProfile(num_voters, alternatives, culture=None):
     '''
     Given the number of voters and alternatives, this function returns a profile with each ballot a randomized shuffle of the alternatives.
     '''
 
-    # Initialize empty list for profile
-    profile = []
-
-    for i in range(num_voters):
-        # For every voter, randomize approved candidates and add to profile
-        ballot = random.sample(
-            alternatives, random.randint(1, len(alternatives)-1))
-        profile.append(ballot)
+    # Draw a single profile from the shared batched generator
+    profile = generateApprovalProfiles(1, num_voters, len(alternatives), culture=culture)[0]
+    profile = approvalBits(profile, len(alternatives))
 
-    return profile
+    return [[alternatives[alternative] for alternative in np.flatnonzero(ballot)] for ballot in profile]
 
 
-def runSim(num_sims, num_alternatives, num_voters):
+def simulateCell(num_sims, num_alternatives, num_voters, rng=None, culture=None):
     '''
-    Performs the simulation and returns the results
+    Performs the simulation, drawing the rankings behind the ballots from culture (impartial culture by default), and
+    returns an OutcomeAccumulator of the number of tied winners of each profile, 1 being a unique winner
     '''
+    rng = np.random.default_rng(rng)
 
-    numUniqueWinners = 0
-    # Set Dictionary to track how many times each number of winners occurs
-    for i in range(num_sims):
+    accumulator = OutcomeAccumulator(num_alternatives + 1)
+    # Generate profiles in batches, then feed the number of tied winners of each to the accumulator
+    for batch_size in batchSizes(num_sims, num_voters, num_alternatives):
+        with phase("generate"):
+            profiles = generateApprovalProfiles(batch_size, num_voters, num_alternatives, rng, culture)
+        with phase("winners"):
+            outcomes = count_approval_winners(profiles, num_alternatives)
+        with phase("accumulate"):
+            accumulator.update(outcomes)
 
-        # Create alternatives, then profiles, then determine condorcet winner each time
-        alternatives = createAlternatives(num_alternatives)
-        profile = generateProfile(num_voters, alternatives)
+    return accumulator
 
-        if has_unique_approval_winner(profile, num_alternatives):
-            numUniqueWinners += 1
 
-    return str(100*numUniqueWinners/num_sims)+"%"
+def formatResult(histogram):
+    '''
+    Converts a histogram or accumulator from simulateCell into the percentage written to the csv
+    '''
+    histogram = np.asarray(histogram)
+    return str(100*int(histogram[1])/int(histogram.sum()))+"%"
 
 
-def outputData(dataframe):
+def runSim(num_sims, num_alternatives, num_voters, rng=None):
+    '''
+    Performs the simulation and returns the results
+    '''
+    return formatResult(simulateCell(num_sims, num_alternatives, num_voters, rng))
+
+
+def outputData(dataframe, path=resultBase("approval") + ".csv"):
     '''
     Outputs the given data as a csv file.
     '''
-    with open("./ApprovalVotingData.csv", "w", newline="") as f:
+    with open(path, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerows(dataframe)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate how often approval voting elections have a unique winner.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes, one per core by default")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="root seed of the sweep, a fresh one is drawn and printed by default, a resumed sweep "
+                             "keeps its seed")
+    parser.add_argument("--half-width", type=float, default=None,
+                        help="simulate each cell until the 95%% interval on its unique winner rate is at most this "
+                             "many percentage points either side, with num_sims as the cap")
+    parser.add_argument("--interval", choices=list(INTERVALS), default="wilson",
+                        help="interval on the unique winner rate that --half-width bounds and the csv reports, kept "
+                             "by a resumed sweep")
+    parser.add_argument("--csv", action="store_true",
+                        help="also export the percentages as a csv next to the result file")
+    parser.add_argument("--cache", default=None,
+                        help="folder of cached chunks to reuse and extend, so only new cells and extra simulations "
+                             "are run, sweeps without --seed use the folder's seed")
+    parser.add_argument("--culture", type=parseCulture, default=None,
+                        help="draw the profiles from this culture instead of impartial culture: mallows:PHI, urn:ALPHA "
+                             "or iac, writing files named after it")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase of the sweep per cell, also turned on by the " + PROFILE_ENV +
+                             " environment variable")
+    args = parser.parse_args()
+    if args.profile:
+        PROFILER.enable()
+
     # Set up environment
     num_sims = 10000
     num_voters_range = (2, 100)
     num_alternatives_range = (2, 10)
+    # Other cultures keep files of their own
+    base = resultBase("approval")
+    if args.culture is not None:
+        base += "-" + cultureName(args.culture)
 
     data = []
     columns = ["num_voters", "num_alternatives", "has_winner"]
+    # Adaptive sweeps also record the number of simulations and the interval of every cell
+    half_width = args.half_width / 100 if args.half_width is not None else None
+    if half_width is not None:
+        columns += ["num_sims", "ci_low", "ci_high"]
     data.append(columns)
 
-    # Run simulation for every pair of num_alternatives and num_voters in the given range
-    for num_alternatives in range(num_alternatives_range[0], num_alternatives_range[1]+1, 1):
-        for num_voters in range(num_voters_range[0], num_voters_range[1]+1, 1):
+    # Run simulation for every pair of num_alternatives and num_voters in the given range, spread over worker processes
+    cells = gridCells(num_alternatives_range, num_voters_range)
+    results = dict()
+    intervals = dict()
+    histograms = dict()
+    exact = dict()
+    simulated = [cell for cell in cells if cell not in results]
+    cache = ResultCache(args.cache, "approval", args.culture) if args.cache is not None else None
+    seed = args.seed if args.seed is not None or cache is None else cache.seed
+    simulate = functools.partial(simulateCell, culture=args.culture)
+    # Journal every finished cell so an interrupted sweep resumes where it stopped
+    with SweepJournal(base + ".journal", num_sims, seed, half_width, args.interval) as journal:
+        print("Seed:", journal.seed)
+        sweep = resumeSweep(simulate, simulated, num_sims, journal, args.workers, cache)
+        for num_alternatives, num_voters, histogram in sweep:
+            histograms[(num_alternatives, num_voters)] = histogram
+            results[(num_alternatives, num_voters)] = formatResult(histogram)
+            if half_width is not None:
+                intervals[(num_alternatives, num_voters)] = formatInterval(histogram, args.interval)
+            print(num_voters, num_alternatives)
 
-            result = runSim(num_sims, num_alternatives, num_voters)
+    for num_alternatives, num_voters in cells:
+        # Initialize list for data to be entered (eventually will be appended to data)
+        row = []
 
-            # Initialize list for data to be entered (eventually will be appended to data)
-            row = []
+        # Enter results into row
 
-            # Enter results into row
+        row.append(num_voters)
+        row.append(num_alternatives)
+        row.append(results[(num_alternatives, num_voters)])
 
-            row.append(num_voters)
-            row.append(num_alternatives)
-            row.append(result)
+        # Exact cells have no sampling error
+        if half_width is not None:
+            result = results[(num_alternatives, num_voters)]
+            row.extend(intervals.get((num_alternatives, num_voters), ["", result, result]))
 
-            data.append(row)
-            print(num_voters, num_alternatives)
+        data.append(row)
 
-    outputData(data)
+    # Keep the raw counts, the csv of percentages is only written on request
+    with phase("output"):
+        saveResults(base + ".npz", "approval", cells, histograms, exact, journal.seed)
+        if args.csv:
+            outputData(data, base + ".csv")
+    journal.discard()
+    reportProfile(base + ".profile.json")
@@ -0,0 +1,298 @@
+# Import dependencies
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# Make the Shared package importable no matter which folder the script is run from
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+from Shared.Approval import unique_approval_winners  # noqa: E402
+from Shared.Compiled import NUMBA_AVAILABLE  # noqa: E402
+from Shared.Condorcet import (count_condorcet_winners, count_condorcet_winners_from_counts,  # noqa: E402
+                              numpyPairwiseMajorities, pairwiseMajorities)
+from Shared.Cultures import iacProfiles, mallowsProfiles, urnProfiles  # noqa: E402
+from Shared.Coombs import (coombsElimination, numpyCoombsElimination, unique_coombs_winners,  # noqa: E402
+                           unique_coombs_winners_from_counts)
+from Shared.InstantRunoff import (irvWinners, numpyIrvWinners, unique_irv_winners,  # noqa: E402
+                                  unique_irv_winners_from_counts)
+from Shared.Profiles import (RankedProfiles, generateApprovalProfiles, generateProfiles,  # noqa: E402
+                             generateRangeProfiles, generateRankingCounts)
+from Shared.RangeVoting import unique_range_winners  # noqa: E402
+from Shared.Results import SIMULATIONS, loadSimulation  # noqa: E402
+from Shared.Scoring import unique_borda_winners, unique_borda_winners_from_counts  # noqa: E402
+
+
+# Default (num_voters, num_alternatives) sizes and batch sizes of the benchmark matrix
+DEFAULT_SIZES = ((11, 3), (51, 5), (101, 10))
+DEFAULT_BATCH_SIZES = (1, 100, 10000)
+
+# The pure Python reference functions handle one profile at a time, so they are only run on batches this small
+REFERENCE_MAX_BATCH = 100
+
+# Default location of the stored baseline
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "KernelBaseline.json")
+
+# Peak memory changes smaller than this are noise, not regressions
+MEMORY_NOISE_BYTES = 64 * 1024
+
+
+def loadScripts():
+    '''
+    Imports every simulation script whose reference functions are benchmarked. Returns a dictionary of modules keyed
+    like SIMULATIONS.
+    '''
+    return {rule: loadSimulation(rule) for rule in SIMULATIONS}
+
+
+def benchmarkCases(modules):
+    '''
+    Lists the benchmarked functions. Each case maps its name to (setup, run, reference): setup(num_voters,
+    num_alternatives, batch_size, rng) builds the untimed input, run(input) is the timed call on batch_size profiles and
+    reference marks the one profile at a time functions of the scripts.
+    '''
+    def referenceProfiles(rule):
+        def setup(num_voters, num_alternatives, batch_size, rng):
+            alternatives = modules[rule].createAlternatives(num_alternatives)
+            return [modules[rule].generateProfile(num_voters, alternatives) for _ in range(batch_size)], alternatives
+        return setup
+
+    def eachProfile(function):
+        def run(arguments):
+            profiles, alternatives = arguments
+            for profile in profiles:
+                function(profile, alternatives)
+        return run
+
+    def generateEach(rule):
+        def setup(num_voters, num_alternatives, batch_size, rng):
+            return num_voters, modules[rule].createAlternatives(num_alternatives), batch_size
+        return setup
+
+    def runGenerateEach(rule):
+        def run(arguments):
+            num_voters, alternatives, batch_size = arguments
+            for _ in range(batch_size):
+                modules[rule].generateProfile(num_voters, alternatives)
+        return run
+
+    def batch(generator):
+        def setup(num_voters, num_alternatives, batch_size, rng):
+            return generator(batch_size, num_voters, num_alternatives, rng), num_alternatives
+        return setup
+
+    def generateBatch(generator):
+        def setup(num_voters, num_alternatives, batch_size, rng):
+            return generator, batch_size, num_voters, num_alternatives, rng
+        return setup
+
+    def runGenerateBatch(arguments):
+        generator, batch_size, num_voters, num_alternatives, rng = arguments
+        generator(batch_size, num_voters, num_alternatives, rng)
+
+    cases = {
+        "has_condorcet_winner": (
+            referenceProfiles("condorcet"),
+            eachProfile(lambda profile, alternatives: modules["condorcet"].has_condorcet_winner(profile, alternatives)),
+            True),
+        "has_unique_borda_winner": (
+            referenceProfiles("borda"),
+            eachProfile(lambda profile, alternatives: modules["borda"].has_unique_borda_winner(profile)),
+            True),
+        "has_unique_irv_winner": (
+            referenceProfiles("irv"),
+            eachProfile(lambda profile, alternatives: modules["irv"].has_unique_irv_winner(profile)),
+            True),
+        "has_unique_coombs_winner": (
+            referenceProfiles("coombs"),
+            eachProfile(lambda profile, alternatives: modules["coombs"].has_unique_coombs_winner(profile)),
+            True),
+        "has_unique_approval_winner": (
+            referenceProfiles("approval"),
+            eachProfile(lambda profile, alternatives:
+                        modules["approval"].has_unique_approval_winner(profile, len(alternatives))),
+            True),
+        "has_unique_range_winner": (
+            referenceProfiles("range"),
+            eachProfile(lambda profile, alternatives: modules["range"].has_unique_range_winner(profile)),
+            True),
+        "count_condorcet_winners": (batch(generateProfiles), lambda arguments: count_condorcet_winners(arguments[0]),
+                                    False),
+        "unique_borda_winners": (batch(generateProfiles), lambda arguments: unique_borda_winners(arguments[0]), False),
+        "unique_irv_winners": (batch(generateProfiles), lambda arguments: unique_irv_winners(arguments[0]), False),
+        "unique_coombs_winners": (batch(generateProfiles), lambda arguments: unique_coombs_winners(arguments[0]),
+                                  False),
+        "unique_approval_winners": (batch(generateApprovalProfiles),
+                                    lambda arguments: unique_approval_winners(*arguments), False),
+        "unique_range_winners": (batch(generateRangeProfiles), lambda arguments: unique_range_winners(arguments[0]),
+                                 False),
+        "irvWinners": (batch(generateProfiles), lambda arguments: irvWinners(arguments[0]), False),
+        "numpyIrvWinners": (batch(generateProfiles), lambda arguments: numpyIrvWinners(arguments[0]), False),
+        "coombsElimination": (batch(generateProfiles), lambda arguments: coombsElimination(arguments[0]), False),
+        "numpyCoombsElimination": (batch(generateProfiles), lambda arguments: numpyCoombsElimination(arguments[0]),
+                                   False),
+        "pairwiseMajorities": (batch(generateProfiles), lambda arguments: pairwiseMajorities(arguments[0]), False),
+        "numpyPairwiseMajorities": (batch(generateProfiles), lambda arguments: numpyPairwiseMajorities(arguments[0]),
+                                    False),
+        "count_condorcet_winners_from_counts": (batch(generateRankingCounts),
+                                                lambda arguments: count_condorcet_winners_from_counts(arguments[0]),
+                                                False),
+        "unique_borda_winners_from_counts": (batch(generateRankingCounts),
+                                             lambda arguments: unique_borda_winners_from_counts(arguments[0]), False),
+        "unique_irv_winners_from_counts": (batch(generateRankingCounts),
+                                           lambda arguments: unique_irv_winners_from_counts(arguments[0]), False),
+        "unique_coombs_winners_from_counts": (batch(generateRankingCounts),
+                                              lambda arguments: unique_coombs_winners_from_counts(arguments[0]), False),
+        "generateProfiles": (generateBatch(generateProfiles), runGenerateBatch, False),
+        "generateRankingCounts": (generateBatch(generateRankingCounts), runGenerateBatch, False),
+        "RankedProfiles.generate": (generateBatch(RankedProfiles.generate), runGenerateBatch, False),
+        "mallowsProfiles": (generateBatch(lambda batch_size, num_voters, num_alternatives, rng: mallowsProfiles(
+            batch_size, num_voters, num_alternatives, 0.5, rng)), runGenerateBatch, False),
+        "urnProfiles": (generateBatch(lambda batch_size, num_voters, num_alternatives, rng: urnProfiles(
+            batch_size, num_voters, num_alternatives, 0.1, rng)), runGenerateBatch, False),
+        "iacProfiles": (generateBatch(iacProfiles), runGenerateBatch, False),
+        "generateApprovalProfiles": (generateBatch(generateApprovalProfiles), runGenerateBatch, False),
+        "generateRangeProfiles": (generateBatch(generateRangeProfiles), runGenerateBatch, False),
+    }
+    for rule in SIMULATIONS:
+        cases[rule + ".generateProfile"] = (generateEach(rule), runGenerateEach(rule), True)
+    return cases
+
+
+def timeCase(setup, run, num_voters, num_alternatives, batch_size, repeats):
+    '''
+    Times one case, returning the best time of repeats runs and the peak memory of a separate traced run, since
+    tracing slows the timed runs down. Every run gets a fresh input, as the IRV and Coombs reference functions remove
+    alternatives from the ballots they are given.
+    '''
+    rng = np.random.default_rng(0)
+    best = float("inf")
+    for _ in range(repeats):
+        arguments = setup(num_voters, num_alternatives, batch_size, rng)
+        start = time.perf_counter()
+        run(arguments)
+        best = min(best, time.perf_counter() - start)
+
+    arguments = setup(num_voters, num_alternatives, batch_size, rng)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run(arguments)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def runBenchmarks(cases, sizes=DEFAULT_SIZES, batch_sizes=DEFAULT_BATCH_SIZES, repeats=5):
+    '''
+    Runs every case on every size and batch size, printing each result as it finishes. Returns the list of results.
+    '''
+    results = []
+    for name, (setup, run, reference) in cases.items():
+        for num_voters, num_alternatives in sizes:
+            for batch_size in batch_sizes:
+                if reference and batch_size > REFERENCE_MAX_BATCH:
+                    continue
+                seconds, peak = timeCase(setup, run, num_voters, num_alternatives, batch_size, repeats)
+                results.append({"case": name, "num_voters": num_voters, "num_alternatives": num_alternatives,
+                                "batch_size": batch_size, "seconds": seconds,
+                                "profiles_per_second": batch_size / seconds, "peak_bytes": peak})
+                print(formatResult(results[-1]))
+    return results
+
+
+def resultKey(result):
+    return result["case"], result["num_voters"], result["num_alternatives"], result["batch_size"]
+
+
+def formatResult(result, baseline=None, flags=()):
+    '''
+    Formats one result as a table row, with its speed and memory relative to baseline when one is given.
+    '''
+    row = "{:<32} n={:<5} m={:<3} batch={:<6} {:>14,.0f} profiles/s {:>12,} B peak".format(
+        result["case"], result["num_voters"], result["num_alternatives"], result["batch_size"],
+        result["profiles_per_second"], result["peak_bytes"])
+    if baseline is not None:
+        row += "  {:>6.2f}x speed {:>6.2f}x memory".format(
+            result["profiles_per_second"] / baseline["profiles_per_second"],
+            result["peak_bytes"] / max(baseline["peak_bytes"], 1))
+    if flags:
+        row += "  REGRESSION: " + ", ".join(flags)
+    return row
+
+
+def compareResults(results, baseline, tolerance=0.2):
+    '''
+    Compares results against a baseline. A result regresses when its profiles per second drop by more than tolerance
+    or its peak memory grows by more than tolerance and MEMORY_NOISE_BYTES. Prints the comparison and returns the
+    number of regressions.
+    '''
+    stored = {resultKey(result): result for result in baseline["results"]}
+    regressions = 0
+    for result in results:
+        reference = stored.get(resultKey(result))
+        if reference is None:
+            print(formatResult(result) + "  (not in baseline)")
+            continue
+
+        flags = []
+        if result["profiles_per_second"] < reference["profiles_per_second"] * (1 - tolerance):
+            flags.append("speed")
+        if result["peak_bytes"] > reference["peak_bytes"] * (1 + tolerance) + MEMORY_NOISE_BYTES:
+            flags.append("memory")
+        regressions += len(flags) > 0
+        print(formatResult(result, reference, flags))
+    return regressions
+
+
+def machineInfo():
+    return {"python": platform.python_version(), "numpy": np.__version__, "numba": NUMBA_AVAILABLE,
+            "platform": platform.platform(), "processor": platform.processor()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the winner determination kernels and profile generators, optionally against a stored "
+                    "baseline.")
+    parser.add_argument("--case", action="append", dest="cases",
+                        help="only run cases whose name contains this text, may be repeated")
+    parser.add_argument("--size", action="append", dest="sizes",
+                        help="num_voters x num_alternatives to run, such as 51x5, may be repeated")
+    parser.add_argument("--batch-size", type=int, action="append", dest="batch_sizes",
+                        help="number of profiles per timed call, may be repeated")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="timed runs per case, the best one is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline to compare against when it exists")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="save the results as a baseline, to the default baseline if no path is given")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown or memory growth flagged as a regression")
+    args = parser.parse_args()
+
+    cases = benchmarkCases(loadScripts())
+    if args.cases:
+        cases = {name: case for name, case in cases.items() if any(text in name for text in args.cases)}
+    sizes = [tuple(int(part) for part in size.split("x")) for size in args.sizes] if args.sizes else DEFAULT_SIZES
+    batch_sizes = args.batch_sizes or DEFAULT_BATCH_SIZES
+
+    results = runBenchmarks(cases, sizes, batch_sizes, args.repeats)
+
+    regressions = 0
+    if os.path.exists(args.baseline) and args.save != args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\nCompared with", args.baseline)
+        regressions = compareResults(results, baseline, args.tolerance)
+        print(regressions, "regressions")
+
+    if args.save is not None:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"machine": machineInfo(), "results": results}, f, indent=2)
+            f.write("\n")
+        print("Saved baseline to", args.save)
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,137 @@
+# Import dependencies
+import argparse
+import functools
+import os
+import sys
+import numpy as np
+import csv
+
+# Make the Shared package importable no matter which folder the script is run from
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Shared.Cache import ResultCache  # noqa: E402
+from Shared.Cultures import cultureName, parseCulture  # noqa: E402
+from Shared.Journal import SweepJournal, resumeSweep  # noqa: E402
+from Shared.Profiles import batchSizes, generateProfiles  # noqa: E402
+from Shared.Profiling import PROFILE_ENV, PROFILER, phase, reportProfile  # noqa: E402
+from Shared.RankedRules import RANKED_RULES, agreementCounts, rankedRuleWinners  # noqa: E402
+from Shared.Sweep import gridCells  # noqa: E402
+
+
+# Results go next to this script whatever the working directory
+DATA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RankedRulesData")
+
+
+def simulateCell(num_sims, num_alternatives, num_voters, rng=None, culture=None):
+    '''
+    Performs the simulation, evaluating every ranked rule on the same profiles drawn from culture (impartial culture by
+    default), and returns the table of agreement counts: entry [i, j] counts the profiles where rules i and j have the
+    same unique winner
+    '''
+    rng = np.random.default_rng(rng)
+
+    agreement = np.zeros((len(RANKED_RULES), len(RANKED_RULES)), dtype=np.int64)
+    # Generate profiles in batches once, then determine the winner of every rule on them
+    for batch_size in batchSizes(num_sims, num_voters, num_alternatives):
+        with phase("generate"):
+            profiles = generateProfiles(batch_size, num_voters, num_alternatives, rng, culture)
+        with phase("winners"):
+            winners = rankedRuleWinners(profiles)
+        with phase("accumulate"):
+            agreement += agreementCounts(winners)
+
+    return agreement
+
+
+def formatResult(agreement, num_sims):
+    '''
+    Converts an agreement table from simulateCell into the percentages written to the csv: first how often each rule
+    has a unique winner, then how often each pair of rules has the same unique winner
+    '''
+    rules = range(len(RANKED_RULES))
+    percentages = [agreement[i, i] for i in rules] + [agreement[i, j] for i in rules for j in rules if i < j]
+    return [str(100*int(count)/num_sims)+"%" for count in percentages]
+
+
+def runSim(num_sims, num_alternatives, num_voters, rng=None):
+    '''
+    Performs the simulation and returns the results
+    '''
+    return formatResult(simulateCell(num_sims, num_alternatives, num_voters, rng), num_sims)
+
+
+def outputData(dataframe, path=DATA_BASE + ".csv"):
+    '''
+    Outputs the given data as a csv file.
+    '''
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(dataframe)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate how often the ranked rules have a unique winner, and how often they agree, on the "
+                    "same elections.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes, one per core by default")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="root seed of the sweep, a fresh one is drawn and printed by default, a resumed sweep "
+                             "keeps its seed")
+    parser.add_argument("--cache", default=None,
+                        help="folder of cached chunks to reuse and extend, so only new cells and extra simulations "
+                             "are run, sweeps without --seed use the folder's seed")
+    parser.add_argument("--culture", type=parseCulture, default=None,
+                        help="draw the profiles from this culture instead of impartial culture: mallows:PHI, urn:ALPHA "
+                             "or iac, writing files named after it")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase of the sweep per cell, also turned on by the " + PROFILE_ENV +
+                             " environment variable")
+    args = parser.parse_args()
+    if args.profile:
+        PROFILER.enable()
+
+    # Set up environment
+    num_sims = 10000
+    num_voters_range = (2, 100)
+    num_alternatives_range = (2, 10)
+    # Other cultures keep files of their own
+    base = DATA_BASE
+    if args.culture is not None:
+        base += "-" + cultureName(args.culture)
+
+    data = []
+    rules = list(RANKED_RULES)
+    columns = ["num_voters", "num_alternatives"] + [rule + "_unique_winner" for rule in rules] + \
+        [rules[i] + "_" + rules[j] + "_agree" for i in range(len(rules)) for j in range(len(rules)) if i < j]
+    data.append(columns)
+
+    # Run simulation for every pair of num_alternatives and num_voters in the given range, spread over worker processes
+    cells = gridCells(num_alternatives_range, num_voters_range)
+    results = dict()
+    cache = ResultCache(args.cache, "ranked", args.culture) if args.cache is not None else None
+    seed = args.seed if args.seed is not None or cache is None else cache.seed
+    simulate = functools.partial(simulateCell, culture=args.culture)
+    # Journal every finished cell so an interrupted sweep resumes where it stopped
+    with SweepJournal(base + ".journal", num_sims, seed) as journal:
+        print("Seed:", journal.seed)
+        sweep = resumeSweep(simulate, cells, num_sims, journal, args.workers, cache)
+        for num_alternatives, num_voters, agreement in sweep:
+            results[(num_alternatives, num_voters)] = formatResult(agreement, num_sims)
+            print(num_voters, num_alternatives)
+
+    for num_alternatives, num_voters in cells:
+        # Initialize list for data to be entered (eventually will be appended to data)
+        row = []
+
+        # Enter results into row
+
+        row.append(num_voters)
+        row.append(num_alternatives)
+        row.extend(results[(num_alternatives, num_voters)])
+
+        data.append(row)
+
+    with phase("output"):
+        outputData(data, base + ".csv")
+    journal.discard()
+    reportProfile(base + ".profile.json")
@@ -0,0 +1,110 @@
+# Import dependencies
+import math
+import numpy as np
+
+
+class OutcomeAccumulator:
+    '''
+    Streaming statistics of the integer outcome of each simulation of a cell, for example whether a profile has a
+    unique winner or how many Condorcet winners it has. Keeps the count, the running mean and sum of squared deviations
+    (Welford, with Chan's formula to fold in a whole batch at once) and the histogram of outcomes, so memory does not
+    grow with the number of simulations. Accumulators of the same cell merge exactly across chunks, workers, machines
+    and repeated runs. np.asarray(accumulator) is its histogram.
+    '''
+
+    def __init__(self, num_outcomes=2):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = np.zeros(num_outcomes, dtype=np.int64)
+
+    def _combine(self, count, mean, m2, histogram):
+        # Chan et al.'s pairwise update of the mean and the sum of squared deviations
+        total = self.count + count
+        if total > 0:
+            delta = mean - self.mean
+            self.m2 += m2 + delta * delta * self.count * count / total
+            self.mean += delta * count / total
+        self.count = total
+
+        if len(histogram) > len(self.histogram):
+            self.histogram = np.pad(self.histogram, (0, len(histogram) - len(self.histogram)))
+        self.histogram[:len(histogram)] += histogram
+
+    def update(self, outcomes):
+        '''
+        Adds a batch of outcomes, one non-negative integer per simulation. Returns the accumulator.
+        '''
+        outcomes = np.asarray(outcomes, dtype=np.int64)
+        if outcomes.size == 0:
+            return self
+        mean = float(outcomes.mean())
+        m2 = float(np.square(outcomes - mean).sum())
+        self._combine(outcomes.size, mean, m2, np.bincount(outcomes))
+        return self
+
+    def merge(self, other):
+        '''
+        Adds the simulations of another accumulator to this one. Returns the accumulator.
+        '''
+        self._combine(other.count, other.mean, other.m2, other.histogram)
+        return self
+
+    @property
+    def variance(self):
+        '''
+        Sample variance of the outcomes, nan with fewer than two simulations.
+        '''
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def standardError(self):
+        '''
+        Standard error of the mean outcome.
+        '''
+        return math.sqrt(self.variance / self.count) if self.count > 1 else math.nan
+
+    def rate(self, outcome=1):
+        '''
+        Fraction of the simulations with the given outcome. Example: rate(1) is the unique winner rate.
+        '''
+        return int(self.histogram[outcome]) / self.count if outcome < len(self.histogram) else 0.0
+
+    def __array__(self, dtype=None, copy=None):
+        return self.histogram.astype(dtype) if dtype is not None else self.histogram.copy()
+
+    def toDict(self):
+        '''
+        JSON friendly form of the accumulator, for journals and for sending partial results between machines.
+        '''
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "histogram": self.histogram.tolist()}
+
+    @classmethod
+    def fromDict(cls, entry):
+        '''
+        Rebuilds an accumulator from toDict.
+        '''
+        accumulator = cls(len(entry["histogram"]))
+        accumulator.count = entry["count"]
+        accumulator.mean = entry["mean"]
+        accumulator.m2 = entry["m2"]
+        accumulator.histogram += np.asarray(entry["histogram"], dtype=np.int64)
+        return accumulator
+
+    @classmethod
+    def fromHistogram(cls, histogram):
+        '''
+        Builds the accumulator of the simulations counted in an outcome histogram.
+        '''
+        histogram = np.asarray(histogram, dtype=np.int64)
+        accumulator = cls(len(histogram))
+        count = int(histogram.sum())
+        if count > 0:
+            outcomes = np.arange(len(histogram))
+            mean = float(outcomes @ histogram) / count
+            accumulator._combine(count, mean, float(np.square(outcomes - mean) @ histogram), histogram)
+        return accumulator
+
+    def __repr__(self):
+        return ("OutcomeAccumulator(count=" + str(self.count) + ", mean=" + str(self.mean) + ", variance=" +
+                str(self.variance) + ", histogram=" + str(self.histogram.tolist()) + ")")
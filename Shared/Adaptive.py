@@ -0,0 +1,66 @@
+# Import dependencies
+import math
+from statistics import NormalDist
+import numpy as np
+
+
+# Confidence level of the intervals written for adaptive sweeps
+DEFAULT_CONFIDENCE = 0.95
+
+# Simulations added to a cell between two checks of its interval
+ADAPTIVE_BATCH_SIZE = 1000
+
+
+def wilsonInterval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    '''
+    Wilson score interval for a binomial proportion. Example: wilsonInterval(50, 100) = (0.4038..., 0.5961...).
+    '''
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    proportion = successes / trials
+    center = (proportion + z ** 2 / (2 * trials)) / (1 + z ** 2 / trials)
+    spread = z / (1 + z ** 2 / trials) * math.sqrt(proportion * (1 - proportion) / trials + z ** 2 / (4 * trials ** 2))
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def clopperPearsonInterval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    '''
+    Exact Clopper-Pearson interval for a binomial proportion, from beta distribution quantiles. Needs scipy.
+    '''
+    from scipy.stats import beta
+
+    alpha = 1 - confidence
+    low = beta.ppf(alpha / 2, successes, trials - successes + 1) if successes > 0 else 0.0
+    high = beta.ppf(1 - alpha / 2, successes + 1, trials - successes) if successes < trials else 1.0
+    return float(low), float(high)
+
+
+INTERVALS = {
+    "wilson": wilsonInterval,
+    "clopper-pearson": clopperPearsonInterval,
+}
+
+
+def uniqueWinnerInterval(histogram, method="wilson", confidence=DEFAULT_CONFIDENCE):
+    '''
+    Confidence interval on the unique winner rate of an outcome histogram, where entry 1 counts the simulations with
+    exactly one winner.
+    '''
+    histogram = np.asarray(histogram)
+    return INTERVALS[method](int(histogram[1]), int(histogram.sum()), confidence)
+
+
+def isPreciseEnough(histogram, half_width, method="wilson", confidence=DEFAULT_CONFIDENCE):
+    '''
+    Returns whether the interval on the unique winner rate of histogram is at most half_width on either side.
+    '''
+    low, high = uniqueWinnerInterval(histogram, method, confidence)
+    return (high - low) / 2 <= half_width
+
+
+def formatInterval(histogram, method="wilson", confidence=DEFAULT_CONFIDENCE):
+    '''
+    Returns the csv columns of an adaptive cell: its number of simulations and the bounds of the interval on its unique
+    winner rate as percentages. Example: formatInterval(np.array([50, 50])) = ['100', '40.38...%', '59.61...%'].
+    '''
+    low, high = uniqueWinnerInterval(histogram, method, confidence)
+    return [str(int(np.asarray(histogram).sum())), str(100*low)+"%", str(100*high)+"%"]
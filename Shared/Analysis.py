@@ -0,0 +1,88 @@
+# Import dependencies
+import functools
+import numpy as np
+from matplotlib import pyplot as plt
+
+from Shared.Figures import FIGURES, drawByParity, drawByVoters, drawHeatmap, drawSurface, resultGrid, surfaceTitle
+from Shared.Results import RESULT_FILES, concatResults, loadRuleResults, resultsFrame
+
+
+@functools.lru_cache(maxsize=None)
+def loadFrame(rules=tuple(RESULT_FILES)):
+    '''
+    Loads the results of the given rules once into one tidy DataFrame with a row per rule and cell, the unique winner
+    rate as a fraction and the parity of the number of voters. The frame is cached, so do not modify it in place.
+    '''
+    frame = resultsFrame(concatResults([loadRuleResults(rule) for rule in rules]))
+    frame["parity"] = np.where(frame["num_voters"] % 2 == 0, "even", "odd")
+    return frame
+
+
+@functools.lru_cache(maxsize=None)
+def aggregates(rules=tuple(RESULT_FILES)):
+    '''
+    Averages the unique winner rate of every rule over the alternatives, each aggregate in one groupby pass over the
+    frame of loadFrame. Returns a dictionary of Series: by_voters indexed by (rule, num_voters), by_parity indexed by
+    (rule, parity) and overall indexed by rule. Cached like loadFrame.
+    '''
+    frame = loadFrame(rules)
+    return {
+        "by_voters": frame.groupby(["rule", "num_voters"])["unique_winner"].mean(),
+        "by_parity": frame.groupby(["rule", "parity"])["unique_winner"].mean(),
+        "overall": frame.groupby("rule")["unique_winner"].mean(),
+    }
+
+
+def plotSurface(rule):
+    '''
+    Shows the unique winner rate of rule as a 3D surface over voters and alternatives.
+    '''
+    results = loadRuleResults(rule)
+    voters, alternatives, grid = resultGrid(results)
+    fig = plt.figure()
+    drawSurface(fig, voters, alternatives, grid, surfaceTitle(FIGURES[rule]["name"], results), FIGURES[rule]["zlabel"])
+    plt.show()
+
+
+def plotHeatmap(rule):
+    '''
+    Shows the unique winner rate of rule as a heatmap over voters and alternatives.
+    '''
+    results = loadRuleResults(rule)
+    voters, alternatives, grid = resultGrid(results)
+    fig = plt.figure()
+    drawHeatmap(fig, voters, alternatives, grid, surfaceTitle(FIGURES[rule]["name"], results))
+    plt.show()
+
+
+def plotByVoters(rule):
+    '''
+    Shows the average unique winner rate of rule by number of voters.
+    '''
+    by_voters = aggregates()["by_voters"].loc[rule]
+    with plt.style.context("ggplot"):
+        fig = plt.figure()
+        drawByVoters(fig, by_voters.index, by_voters.values)
+        plt.show()
+
+
+def plotByParity(rule):
+    '''
+    Shows the average unique winner rate of rule by number of voters, with even and odd numbers of voters as separate
+    lines.
+    '''
+    by_voters = aggregates()["by_voters"].loc[rule]
+    with plt.style.context("ggplot"):
+        fig = plt.figure()
+        drawByParity(fig, by_voters.index, by_voters.values)
+        plt.show()
+
+
+def printAggregates(rule):
+    '''
+    Prints the overall, even population and odd population unique winner percentages of rule.
+    '''
+    results = aggregates()
+    print("Overall Unique Winner Percentage: ", results["overall"].loc[rule]*100)
+    print("Even Population Unique Winner Percentage: ", results["by_parity"].loc[(rule, "even")]*100)
+    print("Odd Population Unique Winner Percentage: ", results["by_parity"].loc[(rule, "odd")]*100)
@@ -0,0 +1,40 @@
+# Import dependencies
+import numpy as np
+
+from Shared.Scoring import countMaxima, uniqueMaxima
+
+
+def approvalScores(profiles, num_alternatives):
+    '''
+    Returns the number of approvals of every alternative, as an int array of shape (num_sims, num_alternatives), for a
+    batch of bitmask profiles from generateApprovalProfiles.
+    '''
+    profiles = np.asarray(profiles)
+    scores = np.empty((len(profiles), num_alternatives), dtype=np.int64)
+    for alternative in range(num_alternatives):
+        bit = profiles.dtype.type(1 << alternative)
+        scores[:, alternative] = np.count_nonzero(profiles & bit, axis=1)
+    return scores
+
+
+def approvalWinners(profiles, num_alternatives):
+    '''
+    Returns the unique approval winner of every profile in a batch from generateApprovalProfiles, or -1 when the most
+    approved alternatives are tied.
+    '''
+    return uniqueMaxima(approvalScores(profiles, num_alternatives))
+
+
+def unique_approval_winners(profiles, num_alternatives):
+    '''
+    Determines whether each profile in a batch from generateApprovalProfiles has a unique approval winner.
+    '''
+    return approvalWinners(profiles, num_alternatives) >= 0
+
+
+def count_approval_winners(profiles, num_alternatives):
+    '''
+    Returns the number of most approved alternatives of every profile in a batch from generateApprovalProfiles, 1 being
+    a unique winner.
+    '''
+    return countMaxima(approvalScores(profiles, num_alternatives))
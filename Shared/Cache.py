@@ -0,0 +1,121 @@
+# Import dependencies
+import hashlib
+import json
+import os
+import time
+
+from Shared.Cultures import IMPARTIAL_CULTURE
+from Shared.Journal import cellEntry, entryHistogram
+from Shared.Sweep import newSeed
+
+
+# Bump whenever a change to the simulations changes what a cached chunk would hold, so older chunks are not reused
+CACHE_VERSION = 2
+
+# Seconds a sweep waits for another one to finish writing the seed of a folder before giving up
+SEED_TIMEOUT = 10
+
+
+def writeJson(path, content):
+    '''
+    Writes content as JSON next to path and renames it into place, so readers never see half a file, even readers on
+    other machines sharing the folder.
+    '''
+    temporary = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + "." + str(os.getpid()) + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(content, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _createSeed(path, seed):
+    # Writes the seed to path unless the file already exists
+    try:
+        descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        json.dump({"seed": seed}, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class ResultCache:
+    '''
+    Content-addressed store of the finished chunks of sweeps of one rule, in a folder any number of sweeps can share.
+    Each chunk is filed under the hash of everything its outcomes depend on: the rule, the cell, the culture, the
+    seed, the chunk's index and its number of simulations. Every chunk draws from cellSeedSequence, so a sweep with the
+    same seed finds the chunks earlier sweeps ran: a grown grid only simulates its new cells and a larger num_sims only
+    the chunks past the cached ones, merged with them exactly as if the whole sweep had run at once. The folder also
+    keeps a seed for sweeps started without one.
+    '''
+
+    def __init__(self, path, rule, culture=None):
+        self.path = path
+        self.rule = rule
+        self.culture = culture if culture is not None else IMPARTIAL_CULTURE
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def seed(self):
+        '''
+        Seed of the folder, drawn by the first sweep that asks for it.
+        '''
+        path = os.path.join(self.path, "seed.json")
+        if not os.path.exists(path):
+            # Write the whole file under a name of its own, then link it into place: only the first sweep's link
+            # succeeds, and every other sweep reads the complete seed it wrote
+            seed = newSeed()
+            candidate = os.path.join(self.path, ".seed." + str(seed) + ".json")
+            writeJson(candidate, {"seed": seed})
+            try:
+                os.link(candidate, path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # The filesystem has no hard links: create the file exclusively and write it in place instead, only
+                # the first sweep creates it and the others wait until it is complete
+                _createSeed(path, seed)
+            finally:
+                os.remove(candidate)
+        deadline = time.monotonic() + SEED_TIMEOUT
+        while True:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)["seed"]
+            except ValueError:
+                # Half written by a sweep that created it in place
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def key(self, num_alternatives, num_voters, seed, chunk, num_sims):
+        return {"version": CACHE_VERSION, "rule": self.rule, "culture": self.culture,
+                "num_alternatives": num_alternatives, "num_voters": num_voters, "seed": seed, "chunk": chunk,
+                "num_sims": num_sims}
+
+    def _file(self, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest[:2], digest + ".json")
+
+    def load(self, num_alternatives, num_voters, seed, chunk, num_sims):
+        '''
+        Returns the cached histogram or OutcomeAccumulator of a chunk, or None when it has not been run.
+        '''
+        key = self.key(num_alternatives, num_voters, seed, chunk, num_sims)
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        return entryHistogram(entry) if entry["key"] == key else None
+
+    def store(self, num_alternatives, num_voters, seed, chunk, num_sims, histogram):
+        '''
+        Caches the histogram or OutcomeAccumulator of a finished chunk.
+        '''
+        key = self.key(num_alternatives, num_voters, seed, chunk, num_sims)
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writeJson(path, dict(cellEntry(num_alternatives, num_voters, histogram), key=key))
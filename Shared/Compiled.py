@@ -0,0 +1,299 @@
+# Import dependencies
+import argparse
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        '''
+        Stand-in for numba.njit when Numba is not installed, leaving the function as plain Python.
+        '''
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+
+# The loops below work on one profile at a time, the way has_unique_irv_winner and the other reference functions do,
+# but on int8 rank arrays from generateProfiles. With Numba they are compiled to machine code, without it they run as
+# plain Python and the batched NumPy kernels are used instead.
+
+
+@njit(cache=True)
+def _irvLoop(profiles, winners, elimination_rounds):
+    num_sims, num_voters, num_alternatives = profiles.shape
+    tallies = np.zeros(num_alternatives, dtype=np.int64)
+    current = np.zeros(num_alternatives, dtype=np.int64)
+    depths = np.zeros(num_voters, dtype=np.int64)
+    # Linked list of the voters whose top remaining choice is each alternative, so a round only visits the ballots of
+    # the alternatives it eliminates
+    heads = np.empty(num_alternatives, dtype=np.int64)
+    nexts = np.empty(num_voters, dtype=np.int64)
+
+    for s in range(num_sims):
+        elimination_rounds[s, :] = -1
+        tallies[:] = 0
+        current[:] = 0
+        heads[:] = -1
+        for v in range(num_voters):
+            a = profiles[s, v, 0]
+            depths[v] = 0
+            current[a] += 1
+            nexts[v] = heads[a]
+            heads[a] = v
+
+        remaining = num_alternatives
+        round_number = 0
+        while remaining > 1:
+            # First choice tallies accumulate over the rounds
+            for a in range(num_alternatives):
+                tallies[a] += current[a]
+
+            # Eliminate every remaining alternative tied for the fewest votes
+            fewest = np.iinfo(np.int64).max
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0 and tallies[a] < fewest:
+                    fewest = tallies[a]
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0 and tallies[a] == fewest:
+                    elimination_rounds[s, a] = round_number
+                    remaining -= 1
+            round_number += 1
+
+            # Move the ballots of the eliminated alternatives down to their next remaining choice
+            if remaining > 1:
+                for a in range(num_alternatives):
+                    if elimination_rounds[s, a] < 0 or heads[a] < 0:
+                        continue
+                    v = heads[a]
+                    while v >= 0:
+                        following = nexts[v]
+                        depth = depths[v] + 1
+                        while elimination_rounds[s, profiles[s, v, depth]] >= 0:
+                            depth += 1
+                        depths[v] = depth
+                        b = profiles[s, v, depth]
+                        current[b] += 1
+                        nexts[v] = heads[b]
+                        heads[b] = v
+                        v = following
+                    heads[a] = -1
+                    current[a] = 0
+
+        winners[s] = -1
+        if remaining == 1:
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0:
+                    winners[s] = a
+
+
+@njit(cache=True)
+def _coombsLoop(profiles, cumulative, winners, elimination_rounds):
+    num_sims, num_voters, num_alternatives = profiles.shape
+    tallies = np.zeros(num_alternatives, dtype=np.int64)
+    current = np.zeros(num_alternatives, dtype=np.int64)
+    depths = np.zeros(num_voters, dtype=np.int64)
+    # Linked list of the voters whose last remaining choice is each alternative, like in _irvLoop
+    heads = np.empty(num_alternatives, dtype=np.int64)
+    nexts = np.empty(num_voters, dtype=np.int64)
+
+    for s in range(num_sims):
+        elimination_rounds[s, :] = -1
+        tallies[:] = 0
+        current[:] = 0
+        heads[:] = -1
+        for v in range(num_voters):
+            a = profiles[s, v, num_alternatives - 1]
+            depths[v] = num_alternatives - 1
+            current[a] += 1
+            nexts[v] = heads[a]
+            heads[a] = v
+
+        remaining = num_alternatives
+        round_number = 0
+        while remaining > 1:
+            # Last place tallies accumulate over the rounds unless cumulative is off
+            for a in range(num_alternatives):
+                tallies[a] = tallies[a] + current[a] if cumulative else current[a]
+
+            # Eliminate every remaining alternative tied for the most last place votes
+            most = -1
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0 and tallies[a] > most:
+                    most = tallies[a]
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0 and tallies[a] == most:
+                    elimination_rounds[s, a] = round_number
+                    remaining -= 1
+            round_number += 1
+
+            # Move the ballots of the eliminated alternatives up to their next remaining choice
+            if remaining > 1:
+                for a in range(num_alternatives):
+                    if elimination_rounds[s, a] < 0 or heads[a] < 0:
+                        continue
+                    v = heads[a]
+                    while v >= 0:
+                        following = nexts[v]
+                        depth = depths[v] - 1
+                        while elimination_rounds[s, profiles[s, v, depth]] >= 0:
+                            depth -= 1
+                        depths[v] = depth
+                        b = profiles[s, v, depth]
+                        current[b] += 1
+                        nexts[v] = heads[b]
+                        heads[b] = v
+                        v = following
+                    heads[a] = -1
+                    current[a] = 0
+
+        winners[s] = -1
+        if remaining == 1:
+            for a in range(num_alternatives):
+                if elimination_rounds[s, a] < 0:
+                    winners[s] = a
+
+
+@njit(cache=True)
+def _pairwiseLoop(profiles, majorities):
+    num_sims, num_voters, num_alternatives = profiles.shape
+    for s in range(num_sims):
+        # Every voter prefers the alternative at each rank to all the ones ranked below it
+        for v in range(num_voters):
+            for r in range(num_alternatives - 1):
+                a = profiles[s, v, r]
+                for lower in range(r + 1, num_alternatives):
+                    majorities[s, a, profiles[s, v, lower]] += 1
+
+
+def compiledIrvElimination(profiles):
+    '''
+    Same as irvElimination, one profile at a time in the compiled loop.
+    '''
+    profiles = np.ascontiguousarray(profiles)
+    winners = np.empty(profiles.shape[0], dtype=np.int64)
+    elimination_rounds = np.empty(profiles.shape[::2], dtype=np.int8)
+    _irvLoop(profiles, winners, elimination_rounds)
+    return winners, elimination_rounds
+
+
+def compiledIrvWinners(profiles):
+    '''
+    Same as irvWinners, one profile at a time in the compiled loop.
+    '''
+    return compiledIrvElimination(profiles)[0]
+
+
+def compiledCoombsElimination(profiles, cumulative=True):
+    '''
+    Same as coombsElimination, one profile at a time in the compiled loop.
+    '''
+    profiles = np.ascontiguousarray(profiles)
+    winners = np.empty(profiles.shape[0], dtype=np.int64)
+    elimination_rounds = np.empty(profiles.shape[::2], dtype=np.int8)
+    _coombsLoop(profiles, cumulative, winners, elimination_rounds)
+    return winners, elimination_rounds
+
+
+def compiledPairwiseMajorities(profiles):
+    '''
+    Same as pairwiseMajorities, one profile at a time in the compiled loop.
+    '''
+    profiles = np.ascontiguousarray(profiles)
+    num_sims, num_voters, num_alternatives = profiles.shape
+    majorities = np.zeros((num_sims, num_alternatives, num_alternatives), dtype=np.int32)
+    _pairwiseLoop(profiles, majorities)
+    return majorities
+
+
+# Default (num_voters, num_alternatives) sizes, with the small and even electorates that tie most often first
+DEFAULT_SIZES = ((1, 2), (2, 2), (4, 2), (2, 3), (3, 3), (4, 3), (6, 3), (4, 4), (7, 4), (10, 5), (25, 6), (51, 10))
+
+# Profiles per size also run through the has_* functions of the simulation scripts, which are much slower
+NUM_REFERENCE_SIMS = 200
+
+
+def verifyCompiled(num_sims=2000, seed=0, sizes=DEFAULT_SIZES):
+    '''
+    Differential check of the compiled loops against the batched NumPy kernels on random profiles of every
+    (num_voters, num_alternatives) size, of both against the has_* functions of the simulation scripts on the first
+    NUM_REFERENCE_SIMS of them, and of the plain Python loops on a few of them when Numba is installed. Returns a list
+    of the mismatches, empty when every output is identical.
+    '''
+    from Shared.Condorcet import numpyPairwiseMajorities, weakCondorcetWinners
+    from Shared.Coombs import numpyCoombsElimination
+    from Shared.InstantRunoff import numpyIrvElimination
+    from Shared.Profiles import generateProfiles
+    from Shared.Verify import referenceOutcomes
+
+    checks = {
+        "irv": (compiledIrvElimination, numpyIrvElimination),
+        "coombs": (compiledCoombsElimination, numpyCoombsElimination),
+        "coombs round by round": (lambda profiles: compiledCoombsElimination(profiles, False),
+                                  lambda profiles: numpyCoombsElimination(profiles, False)),
+        "pairwise": (compiledPairwiseMajorities, numpyPairwiseMajorities),
+    }
+    # Outcome of the has_* function of the rule of every check, from the output of either kernel
+    outcomes = {
+        "irv": ("irv", lambda output, num_voters: output[0] >= 0),
+        "coombs": ("coombs", lambda output, num_voters: output[0] >= 0),
+        "pairwise": ("condorcet", lambda majorities, num_voters: np.count_nonzero(
+            weakCondorcetWinners(majorities, num_voters), axis=1)),
+    }
+    plain = {
+        "irv": lambda profiles: _plainCall(_irvLoop, profiles, np.empty(len(profiles), dtype=np.int64),
+                                           np.empty(profiles.shape[::2], dtype=np.int8)),
+        "pairwise": lambda profiles: _plainCall(_pairwiseLoop, profiles, np.zeros(
+            (len(profiles), profiles.shape[2], profiles.shape[2]), dtype=np.int32)),
+    }
+
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for num_voters, num_alternatives in sizes:
+        profiles = generateProfiles(num_sims, num_voters, num_alternatives, rng)
+        for name, (compiled, reference) in checks.items():
+            if not _sameOutputs(compiled(profiles), reference(profiles)):
+                mismatches.append((name, num_voters, num_alternatives))
+        for name, (rule, outcome) in outcomes.items():
+            expected = referenceOutcomes(rule, profiles[:NUM_REFERENCE_SIMS], num_alternatives)
+            for kind, kernel in zip(("compiled", "numpy"), checks[name]):
+                if not np.array_equal(outcome(kernel(profiles[:NUM_REFERENCE_SIMS]), num_voters), expected):
+                    mismatches.append((name + " " + kind + " against has_*", num_voters, num_alternatives))
+        if NUMBA_AVAILABLE:
+            for name, function in plain.items():
+                compiled = checks[name][0](profiles[:50])
+                if not _sameOutputs(function(profiles[:50]), compiled):
+                    mismatches.append((name + " without numba", num_voters, num_alternatives))
+    return mismatches
+
+
+def _plainCall(loop, profiles, *outputs):
+    # Runs the Python source of a compiled loop and returns the array it fills, or a tuple of them
+    getattr(loop, "py_func", loop)(np.ascontiguousarray(profiles), *outputs)
+    return outputs if len(outputs) > 1 else outputs[0]
+
+
+def _sameOutputs(first, second):
+    if isinstance(first, tuple):
+        return all(np.array_equal(a, b) for a, b in zip(first, second))
+    return np.array_equal(first, second)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the compiled kernels against the NumPy kernels and the "
+                                                 "has_* functions of the simulation scripts.")
+    parser.add_argument("--num-sims", type=int, default=2000,
+                        help="random profiles per size")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random profiles")
+    args = parser.parse_args()
+
+    print("Numba available:", NUMBA_AVAILABLE)
+    mismatches = verifyCompiled(args.num_sims, args.seed)
+    for name, num_voters, num_alternatives in mismatches:
+        print("Mismatch:", name, "with", num_voters, "voters and", num_alternatives, "alternatives")
+    print("All outputs identical" if not mismatches else str(len(mismatches)) + " mismatches")
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,93 @@
+# Import dependencies
+import functools
+import numpy as np
+
+from Shared.Compiled import NUMBA_AVAILABLE, compiledPairwiseMajorities
+from Shared.Profiles import allRankings, countAlternatives, rankPositions
+
+
+def numpyPairwiseMajorities(profiles):
+    '''
+    Computes the pairwise majority matrix of every profile in a batch from generateProfiles.
+    Returns an int array of shape (num_sims, num_alternatives, num_alternatives) where majorities[s, a, b] is the
+    number of voters in profile s who rank alternative a above alternative b.
+    '''
+    # rankPositions hands out the cached positions of a RankedProfiles, so it gets profiles before any conversion
+    positions = rankPositions(profiles)
+    num_sims, num_voters, num_alternatives = positions.shape
+
+    majorities = np.zeros((num_sims, num_alternatives, num_alternatives), dtype=np.int32)
+    for a in range(num_alternatives):
+        for b in range(a + 1, num_alternatives):
+            # A smaller position means the voter prefers the alternative
+            prefer_a = np.count_nonzero(positions[:, :, a] < positions[:, :, b], axis=1)
+            majorities[:, a, b] = prefer_a
+            majorities[:, b, a] = num_voters - prefer_a
+
+    return majorities
+
+
+def pairwiseMajorities(profiles):
+    '''
+    Same as numpyPairwiseMajorities, with the compiled loop when Numba is installed.
+    '''
+    if NUMBA_AVAILABLE:
+        return compiledPairwiseMajorities(profiles)
+    return numpyPairwiseMajorities(profiles)
+
+
+def pairwiseMajoritiesFromCounts(counts):
+    '''
+    Same as pairwiseMajorities for ranking counts from generateRankingCounts, as one product with a (rankings,
+    alternatives * alternatives) table of which pairs each ranking puts in which order.
+    '''
+    counts = np.asarray(counts)
+    num_alternatives = countAlternatives(counts)
+
+    # Floating point products are exact for counts below 2**53 and much faster than integer ones
+    majorities = np.rint(counts @ _pairTable(num_alternatives)).astype(np.int32)
+    return majorities.reshape(len(counts), num_alternatives, num_alternatives)
+
+
+@functools.lru_cache(maxsize=None)
+def _pairTable(num_alternatives):
+    # table[t, a * num_alternatives + b] is 1 when ranking t puts alternative a above alternative b
+    positions = rankPositions(allRankings(num_alternatives))
+    table = positions[:, :, None] < positions[:, None, :]
+    return table.reshape(len(positions), -1).astype(np.float64)
+
+
+def weakCondorcetWinners(majorities, num_voters):
+    '''
+    Given pairwise majority matrices from pairwiseMajorities, returns a boolean array of shape (num_sims,
+    num_alternatives) marking the weak Condorcet winners: alternatives no other alternative beats with more than half
+    of the votes, the same rule as has_condorcet_winner. num_voters may also be an array with one entry per profile.
+    '''
+    num_voters = np.reshape(num_voters, (-1, 1, 1)) if np.ndim(num_voters) else num_voters
+    return np.all(2 * majorities <= num_voters, axis=1)
+
+
+def count_condorcet_winners(profiles):
+    '''
+    Returns the number of Condorcet winners of every profile in a batch from generateProfiles.
+    '''
+    winners = weakCondorcetWinners(pairwiseMajorities(profiles), np.shape(profiles)[1])
+    return np.count_nonzero(winners, axis=1)
+
+
+def condorcetWinners(profiles):
+    '''
+    Returns the Condorcet winner of every profile in a batch from generateProfiles when it is the only weak Condorcet
+    winner, or -1 when there is none or several.
+    '''
+    winners = weakCondorcetWinners(pairwiseMajorities(profiles), np.shape(profiles)[1])
+    return np.where(np.count_nonzero(winners, axis=1) == 1, winners.argmax(axis=1), -1)
+
+
+def count_condorcet_winners_from_counts(counts):
+    '''
+    Returns the number of Condorcet winners of every profile in a batch of ranking counts from generateRankingCounts.
+    '''
+    counts = np.asarray(counts)
+    winners = weakCondorcetWinners(pairwiseMajoritiesFromCounts(counts), counts.sum(axis=-1))
+    return np.count_nonzero(winners, axis=1)
@@ -0,0 +1,132 @@
+# Import dependencies
+import numpy as np
+
+from Shared.Compiled import NUMBA_AVAILABLE, compiledCoombsElimination
+from Shared.Profiles import countBallots, runningBallots
+from Shared.Scoring import countFinalists
+
+
+def numpyCoombsElimination(profiles, cumulative=True, weights=None):
+    '''
+    Runs Coombs' method on every profile in a batch from generateProfiles at once, eliminating every remaining
+    alternative tied for the most last place votes each round. Each ballot keeps a pointer to its last remaining choice
+    and only the ballots whose last choice was just eliminated are moved, looking only at the ballots of profiles still
+    running, so the last place tally is updated rather than recounted. compiledCoombsElimination goes further and keeps
+    the ballots of every alternative in a list, visiting only those it moves.
+    When cumulative is True the tallies add up over the rounds like in has_unique_coombs_winner, otherwise every round
+    uses only that round's last place votes, as in Coombs' method proper. The default keeps parity with
+    has_unique_coombs_winner, whose never reset scores produced the published results and which the kernels are
+    verified against. weights, of shape (num_sims, num_voters), optionally counts every ballot that many times.
+    Returns the unique winner of every profile (-1 when the last alternatives were eliminated together) and an int8
+    array of shape (num_sims, num_alternatives) giving the round each alternative was eliminated in (-1 if never).
+    '''
+    profiles = np.asarray(profiles)
+    num_sims, num_voters, num_alternatives = profiles.shape
+    ballots = profiles.reshape(num_sims * num_voters, num_alternatives)
+    num_cells = num_sims * num_alternatives
+
+    # Every ballot's current last choice as a flat (profile, alternative) index, and the rank that choice sits at
+    offsets = np.repeat(np.arange(num_sims) * num_alternatives, num_voters)
+    last_choices = offsets + ballots[:, -1]
+    depths = np.full(num_sims * num_voters, num_alternatives - 1, dtype=np.intp)
+    weights = np.ravel(weights) if weights is not None else None
+
+    def tally(voters):
+        # Last place votes of the given ballots per (profile, alternative)
+        if weights is None:
+            votes = np.bincount(last_choices[voters], minlength=num_cells)
+        else:
+            votes = np.rint(np.bincount(last_choices[voters], weights[voters], minlength=num_cells)).astype(np.int64)
+        return votes.reshape(num_sims, num_alternatives)
+
+    elimination_rounds = np.full((num_sims, num_alternatives), -1, dtype=np.int8)
+    tallies = np.zeros((num_sims, num_alternatives), dtype=np.int64)
+    last_place_votes = tally(slice(None))
+
+    # Profiles that still have more than one alternative left
+    running = np.ones(num_sims, dtype=bool)
+    round_number = 0
+    while running.any():
+        if cumulative:
+            tallies[running] += last_place_votes[running]
+        else:
+            tallies = last_place_votes.copy()
+
+        # Eliminate every remaining alternative tied for the most last place votes
+        eliminated = elimination_rounds >= 0
+        remaining_tallies = np.where(eliminated | ~running[:, None], -1, tallies)
+        newly_eliminated = (remaining_tallies == remaining_tallies.max(axis=1, keepdims=True)) & running[:, None]
+        elimination_rounds[newly_eliminated] = round_number
+        eliminated |= newly_eliminated
+        running &= np.count_nonzero(~eliminated, axis=1) > 1
+        round_number += 1
+
+        # Move ballots whose last choice was eliminated up to their next choice, in profiles still running
+        voters = runningBallots(newly_eliminated, last_choices, running)
+        moved = voters
+        while len(voters):
+            depths[voters] -= 1
+            last_choices[voters] = offsets[voters] + ballots[voters, depths[voters]]
+            voters = voters[eliminated.ravel()[last_choices[voters]]]
+
+        last_place_votes[newly_eliminated] = 0
+        last_place_votes += tally(moved)
+
+    remaining = elimination_rounds < 0
+    winners = np.where(np.count_nonzero(remaining, axis=1) == 1, remaining.argmax(axis=1), -1)
+    return winners, elimination_rounds
+
+
+def coombsElimination(profiles, cumulative=True):
+    '''
+    Same as numpyCoombsElimination, with the compiled loop when Numba is installed.
+    '''
+    if NUMBA_AVAILABLE:
+        return compiledCoombsElimination(profiles, cumulative)
+    return numpyCoombsElimination(profiles, cumulative)
+
+
+def coombsWinners(profiles, cumulative=True):
+    '''
+    Returns the unique Coombs winner of every profile in a batch from generateProfiles, or -1 when there is none.
+    '''
+    return coombsElimination(profiles, cumulative)[0]
+
+
+def unique_coombs_winners(profiles, cumulative=True):
+    '''
+    Determines whether each profile in a batch from generateProfiles has a unique Coombs winner.
+    '''
+    return coombsWinners(profiles, cumulative) >= 0
+
+
+def count_coombs_winners(profiles, cumulative=True):
+    '''
+    Returns the number of tied Coombs winners of every profile in a batch from generateProfiles, the alternatives left
+    in the last round, 1 being a unique winner.
+    '''
+    return countFinalists(coombsElimination(profiles, cumulative)[1])
+
+
+def coombsWinnersFromCounts(counts, cumulative=True):
+    '''
+    Same as coombsWinners for ranking counts from generateRankingCounts, running each ranking as one ballot weighted by
+    its count.
+    '''
+    counts = np.asarray(counts)
+    return numpyCoombsElimination(countBallots(counts), cumulative, counts)[0]
+
+
+def unique_coombs_winners_from_counts(counts, cumulative=True):
+    '''
+    Determines whether each profile in a batch of ranking counts from generateRankingCounts has a unique Coombs winner.
+    '''
+    return coombsWinnersFromCounts(counts, cumulative) >= 0
+
+
+def count_coombs_winners_from_counts(counts, cumulative=True):
+    '''
+    Same as count_coombs_winners for ranking counts from generateRankingCounts.
+    '''
+    counts = np.asarray(counts)
+    return countFinalists(numpyCoombsElimination(countBallots(counts), cumulative, counts)[1])
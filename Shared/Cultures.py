@@ -0,0 +1,156 @@
+# Import dependencies
+import math
+import numpy as np
+
+from Shared.Profiles import allRankings, generateProfiles, generateRankingCounts, rankPositions
+
+
+# Culture every simulation draws its profiles from unless told otherwise: every ballot a uniform random ranking
+IMPARTIAL_CULTURE = {"name": "impartial"}
+
+# Parameter of every culture, in the order of the --culture option. Example: "mallows:0.5" is {"name": "mallows",
+# "phi": 0.5}
+CULTURE_PARAMETERS = {
+    "impartial": (),
+    "mallows": ("phi",),
+    "urn": ("alpha",),
+    "iac": (),
+}
+
+
+def isImpartial(culture):
+    '''
+    Returns whether culture, a dictionary like IMPARTIAL_CULTURE or None, is impartial culture.
+    '''
+    return culture is None or culture["name"] == "impartial"
+
+
+def parseCulture(text):
+    '''
+    Parses a culture written as its name followed by its parameters, separated by colons. Returns None for impartial
+    culture. Example: parseCulture("urn:0.1") = {"name": "urn", "alpha": 0.1}.
+    '''
+    name, *values = text.split(":")
+    if name not in CULTURE_PARAMETERS:
+        raise ValueError("Unknown culture " + name + ", expected one of " + ", ".join(CULTURE_PARAMETERS))
+    if len(values) != len(CULTURE_PARAMETERS[name]):
+        raise ValueError("Culture " + name + " takes the parameters " + str(CULTURE_PARAMETERS[name]))
+    culture = dict(zip(CULTURE_PARAMETERS[name], (float(value) for value in values)), name=name)
+    return None if isImpartial(culture) else culture
+
+
+def cultureName(culture):
+    '''
+    Short name of a culture for file names. Example: cultureName({"name": "mallows", "phi": 0.5}) = "mallows-0.5".
+    '''
+    if isImpartial(culture):
+        return "impartial"
+    return "-".join([culture["name"]] + [format(culture[parameter], "g") for parameter in CULTURE_PARAMETERS[
+        culture["name"]]])
+
+
+def mallowsProfiles(num_sims, num_voters, num_alternatives, phi, rng=None):
+    '''
+    Draws Mallows profiles in the generateProfiles layout: each ranking has probability proportional to phi to the
+    power of its Kendall tau distance from the ranking 0, 1, ..., num_alternatives-1. phi=1 is impartial culture and
+    phi=0 gives every voter the reference ranking. Uses the repeated insertion model for every voter at once:
+    alternative i is inserted into the ranking of the first i alternatives, j places above the bottom with probability
+    proportional to phi**j, as each of those j places puts it above one alternative it comes after in the reference.
+    '''
+    rng = np.random.default_rng(rng)
+    positions = np.zeros((num_sims, num_voters, num_alternatives), dtype=np.int8)
+    for alternative in range(1, num_alternatives):
+        # Probability of inserting at each position, from the top of the ranking so far to its bottom
+        weights = phi ** np.arange(alternative, -1, -1, dtype=np.float64)
+        cumulative = np.cumsum(weights)
+        inserted = np.searchsorted(cumulative, rng.random((num_sims, num_voters)) * cumulative[-1], side="right")
+        inserted = np.minimum(inserted, alternative).astype(np.int8)
+
+        # Alternatives at or below the insertion point move down one place
+        placed = positions[:, :, :alternative]
+        placed += placed >= inserted[:, :, None]
+        positions[:, :, alternative] = inserted
+
+    # The inverse of a ranking's positions is the ranking itself
+    return rankPositions(positions)
+
+
+def urnProfiles(num_sims, num_voters, num_alternatives, alpha, rng=None):
+    '''
+    Draws Polya-Eggenberger urn profiles in the generateProfiles layout. The urn starts with every ranking once, and
+    every drawn ranking goes back with alpha * num_alternatives! copies, so the k-th voter (from 0) draws a fresh
+    uniform ranking with probability 1 / (1 + k * alpha) and otherwise copies an earlier voter chosen uniformly.
+    alpha=0 is impartial culture and alpha=1/num_alternatives! is impartial anonymous culture.
+    '''
+    rng = np.random.default_rng(rng)
+    rankings = generateProfiles(num_sims, num_voters, num_alternatives, rng)
+
+    voters = np.arange(num_voters)
+    fresh = rng.random((num_sims, num_voters)) * (1 + voters * alpha) < 1
+    sources = np.where(fresh, voters, np.floor(rng.random((num_sims, num_voters)) * voters).astype(np.intp))
+
+    # Follow the copies back to the voter who drew the ranking fresh, doubling the distance covered every step
+    while True:
+        followed = np.take_along_axis(sources, sources, axis=1)
+        if np.array_equal(followed, sources):
+            break
+        sources = followed
+    return np.take_along_axis(rankings, sources[:, :, None], axis=1)
+
+
+def iacProfiles(num_sims, num_voters, num_alternatives, rng=None):
+    '''
+    Draws impartial anonymous culture profiles in the generateProfiles layout, where every split of the voters among
+    the rankings is equally likely, as the urn with alpha = 1/num_alternatives!.
+    '''
+    return urnProfiles(num_sims, num_voters, num_alternatives, 1 / math.factorial(num_alternatives), rng)
+
+
+def mallowsProbabilities(num_alternatives, phi):
+    '''
+    Returns the Mallows probability of every ranking of allRankings.
+    '''
+    rankings = allRankings(num_alternatives)
+    # The Kendall tau distance from the reference is the number of pairs ranked in the wrong order
+    distances = np.count_nonzero(np.triu(rankings[:, :, None] > rankings[:, None, :], 1), axis=(1, 2))
+    weights = phi ** distances.astype(np.float64)
+    return weights / weights.sum()
+
+
+def sampleProfiles(culture, num_sims, num_voters, num_alternatives, rng=None):
+    '''
+    Draws num_sims profiles from culture in the generateProfiles layout.
+    '''
+    if isImpartial(culture):
+        return generateProfiles(num_sims, num_voters, num_alternatives, rng)
+    if culture["name"] == "mallows":
+        return mallowsProfiles(num_sims, num_voters, num_alternatives, culture["phi"], rng)
+    if culture["name"] == "urn":
+        return urnProfiles(num_sims, num_voters, num_alternatives, culture["alpha"], rng)
+    if culture["name"] == "iac":
+        return iacProfiles(num_sims, num_voters, num_alternatives, rng)
+    raise ValueError("Unknown culture " + str(culture["name"]))
+
+
+def sampleRankingCounts(culture, num_sims, num_voters, num_alternatives, rng=None):
+    '''
+    Draws num_sims profiles from culture as ranking counts in the layout of generateRankingCounts. Mallows counts are
+    multinomial over the Mallows probabilities of the rankings, urn and impartial anonymous culture counts
+    Dirichlet-multinomial, which is what the urn's draws add up to.
+    '''
+    rng = np.random.default_rng(rng)
+    num_rankings = math.factorial(num_alternatives)
+    if isImpartial(culture):
+        return generateRankingCounts(num_sims, num_voters, num_alternatives, rng)
+    if culture["name"] == "mallows":
+        probabilities = mallowsProbabilities(num_alternatives, culture["phi"])
+    elif culture["name"] in ("urn", "iac"):
+        # Starting with one of each ranking and adding alpha * num_rankings copies per draw is the Polya urn of
+        # Dirichlet(1 / (alpha * num_rankings)) proportions
+        alpha = culture["alpha"] if culture["name"] == "urn" else 1 / num_rankings
+        if alpha == 0:
+            return generateRankingCounts(num_sims, num_voters, num_alternatives, rng)
+        probabilities = rng.dirichlet(np.full(num_rankings, 1 / (alpha * num_rankings)), size=num_sims)
+    else:
+        raise ValueError("Unknown culture " + str(culture["name"]))
+    return rng.multinomial(num_voters, probabilities, size=num_sims if probabilities.ndim == 1 else None)
@@ -0,0 +1,132 @@
+# Import dependencies
+import itertools
+import math
+import numpy as np
+
+from Shared.Profiles import allRankings, batchSizes
+
+
+# Largest number of anonymous profiles enumerated for one cell before falling back to simulation
+MAX_EXACT_PROFILES = 10 ** 6
+
+# Largest number of count comparisons spent finding relabeling classes, profiles * num_alternatives! ** 2
+MAX_EXACT_WORK = 3 * 10 ** 8
+
+# Largest number of ranks expanded into ballots for the kernel, profiles * num_voters * num_alternatives, which grows
+# as num_voters ** 2 with two alternatives even though there are few profiles
+MAX_EXACT_RANKS = 2 * 10 ** 8
+
+
+def relabelingTable(rankings):
+    '''
+    Returns an int array of shape (num_alternatives!, num_rankings) where row i maps every ranking to its index after
+    the alternatives are renamed by the i-th ranking read as a permutation. Row 0 is the identity.
+    '''
+    index = {tuple(ranking): i for i, ranking in enumerate(rankings.tolist())}
+    return np.array([[index[tuple(permutation[ranking])] for ranking in rankings] for permutation in rankings])
+
+
+def numAnonymousProfiles(num_voters, num_alternatives):
+    '''
+    Returns the number of anonymous profiles, the ways to split num_voters voters among the num_alternatives!
+    rankings. Example: numAnonymousProfiles(2, 2) = 3.
+    '''
+    num_rankings = math.factorial(num_alternatives)
+    return math.comb(num_voters + num_rankings - 1, num_rankings - 1)
+
+
+def canEnumerate(num_voters, num_alternatives):
+    '''
+    Returns whether exactDistribution can enumerate the cell quickly, otherwise the cell should be simulated.
+    '''
+    num_profiles = numAnonymousProfiles(num_voters, num_alternatives)
+    return (num_profiles <= MAX_EXACT_PROFILES
+            and num_profiles * math.factorial(num_alternatives) ** 2 <= MAX_EXACT_WORK
+            and num_profiles * num_voters * num_alternatives <= MAX_EXACT_RANKS)
+
+
+def compositions(total, num_parts):
+    '''
+    Returns every way to write total as an ordered sum of num_parts non-negative integers, as an int array of shape
+    (numCompositions, num_parts). Example: compositions(2, 2) = [[0, 2], [1, 1], [2, 0]].
+    '''
+    # Stars and bars: every choice of num_parts-1 bar positions among total+num_parts-1 slots is one composition
+    bars = np.array(list(itertools.combinations(range(total + num_parts - 1), num_parts - 1)), dtype=np.int64, ndmin=2)
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), total + num_parts - 1)])
+    return (np.diff(edges, axis=1) - 1).astype(np.min_scalar_type(total))
+
+
+def multinomialProbabilities(counts):
+    '''
+    Returns the impartial culture probability of each row of ranking counts: the multinomial coefficient of the row
+    divided by num_rankings ** num_voters.
+    '''
+    num_voters = int(counts[0].sum())
+    log_factorials = np.array([math.lgamma(i + 1) for i in range(num_voters + 1)])
+    log_weights = log_factorials[num_voters] - log_factorials[counts].sum(axis=1)
+    return np.exp(log_weights - num_voters * math.log(counts.shape[1]))
+
+
+def orbitRepresentatives(counts, table):
+    '''
+    Groups rows of ranking counts into classes of profiles that differ only by alternative labels. Returns a boolean
+    mask selecting the lexicographically smallest row of every class, and the size of each row's class.
+    '''
+    smallest = np.ones(len(counts), dtype=bool)
+    stabilizers = np.ones(len(counts), dtype=np.int64)
+    rows = np.arange(len(counts))
+    for relabeling in table[1:]:
+        candidate = counts[:, relabeling]
+
+        # Compare the relabeled row to the original at the first column where they differ
+        differs = candidate != counts
+        first = differs.argmax(axis=1)
+        changed = differs[rows, first]
+        smallest &= ~(changed & (candidate[rows, first] < counts[rows, first]))
+        stabilizers += ~changed
+
+    return smallest, len(table) // stabilizers
+
+
+def expandProfiles(counts, rankings):
+    '''
+    Turns rows of ranking counts into a batch of profiles in the generateProfiles layout, each voter holding the
+    ranking their count belongs to.
+    '''
+    num_profiles, num_rankings = counts.shape
+    num_voters = int(counts[0].sum())
+    types = np.repeat(np.tile(np.arange(num_rankings), num_profiles), counts.ravel())
+    return rankings[types.reshape(num_profiles, num_voters)]
+
+
+def exactDistribution(kernel, num_voters, num_alternatives):
+    '''
+    Computes the exact impartial culture distribution of kernel's outcome for one cell. kernel takes a batch of
+    profiles from generateProfiles and returns one integer outcome per profile, for example the number of Condorcet
+    winners. Every anonymous profile is enumerated once per relabeling class, weighted by its multinomial probability.
+    Returns a dictionary mapping each outcome that can occur to its probability.
+    '''
+    if not canEnumerate(num_voters, num_alternatives):
+        raise ValueError("Too many anonymous profiles to enumerate for " + str(num_voters) + " voters and " +
+                         str(num_alternatives) + " alternatives")
+
+    rankings = allRankings(num_alternatives)
+    counts = compositions(num_voters, len(rankings))
+
+    # Keep one profile per relabeling class, the rules do not depend on alternative names and relabeling a profile
+    # does not change its probability
+    smallest, class_sizes = orbitRepresentatives(counts, relabelingTable(rankings))
+    canonical = counts[smallest]
+    class_probabilities = multinomialProbabilities(canonical) * class_sizes[smallest]
+
+    distribution = dict()
+    start = 0
+    for batch_size in batchSizes(len(canonical), num_voters, num_alternatives):
+        batch = slice(start, start + batch_size)
+        outcomes = np.asarray(kernel(expandProfiles(canonical[batch], rankings)), dtype=np.int64)
+        for outcome, probability in enumerate(np.bincount(outcomes, weights=class_probabilities[batch])):
+            if probability > 0:
+                distribution[outcome] = distribution.get(outcome, 0.0) + float(probability)
+        start += batch_size
+
+    return distribution
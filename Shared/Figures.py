@@ -0,0 +1,258 @@
+# Import dependencies
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import matplotlib.style
+import numpy as np
+from matplotlib.figure import Figure
+from PIL import Image
+
+from Shared.Results import RESULT_FILES, ROOT, loadRuleResults
+
+
+# Bump whenever the drawing code changes, so figures rendered by older code are not skipped as up to date
+FIGURE_VERSION = 1
+
+# PNG text key holding the hash each figure was rendered from, so the committed images record it themselves
+HASH_KEY = "FigureHash"
+
+# Image folder, figure file names and labels of every rule, a name of None titles the figures with "a Unique Winner"
+FIGURES = {
+    "approval": {
+        "directory": "Approval Voting/Images",
+        "surface": "Approval3DGraph.png",
+        "heatmap": "ApprovalVotingHeatmap.png",
+        "by_voters": "AvgWinnerApprovalRatingByPopSize.png",
+        "by_parity": "avgWinnerPctPopSizeParity.png",
+        "name": None,
+        "zlabel": "Unique Winner Percentage",
+    },
+    "borda": {
+        "directory": "Borda/Images",
+        "surface": "BordaCount3DGraph.png",
+        "heatmap": "BordaHeatmap.png",
+        "by_voters": "AvgUniqueBordaWinner.png",
+        "by_parity": "AvgUniqueBordaWinnerByParity.png",
+        "name": "Borda Count",
+        "zlabel": "Borda Count Unique Winner Percentage",
+    },
+    "condorcet": {
+        "directory": "Condorcet/Images",
+        "surface": "CondorcetUniqueWinnerGraph3D.png",
+        "heatmap": "CondorcetHeatmap.png",
+        "by_voters": "AvgWinPctByNumVotersGraph.png",
+        "by_parity": "AvgWinPctByNumVotersParityGraph.png",
+        "name": "Condorcet",
+        "zlabel": "Condorcet Unique Winner Percentage",
+    },
+    "coombs": {
+        "directory": "Coombs/Images",
+        "surface": "Coombs3Dgraph.png",
+        "heatmap": "CoombsHeatmap.png",
+        "by_voters": "avgWinnerPctNumVotersCoombs.png",
+        "by_parity": "CoombsAvgWinnerPctParity.png",
+        "name": None,
+        "zlabel": "Unique Winner Percentage",
+    },
+    "irv": {
+        "directory": "Instant Runoff/Images",
+        "surface": "Irv3DGraph.png",
+        "heatmap": "IrvHeatmap.png",
+        "by_voters": "IrvWinnerPctByPop.png",
+        "by_parity": "IrvWinPctPopParity.png",
+        "name": None,
+        "zlabel": "Unique Winner Percentage",
+    },
+    "range": {
+        "directory": "Range Voting/Images",
+        "surface": "RangeVoting3DGraph.png",
+        "heatmap": "RangeVotingHeatmap.png",
+        "by_voters": "AvgWinnerPctPopSize.png",
+        "by_parity": "AvgWinnerPctPopSizeParity.png",
+        "name": None,
+        "zlabel": None,
+    },
+}
+
+# Kinds of figure drawn for every rule
+FIGURE_KINDS = ("surface", "heatmap", "by_voters", "by_parity")
+
+
+def resultGrid(results):
+    '''
+    Places the unique winner rates of loadResults arrays on their regular grid. Returns (voters, alternatives, grid)
+    where grid[i, j] is the rate with alternatives[i] alternatives and voters[j] voters, nan for missing cells.
+    '''
+    voters = np.unique(results["num_voters"])
+    alternatives = np.unique(results["num_alternatives"])
+    grid = np.full((len(alternatives), len(voters)), np.nan)
+    grid[np.searchsorted(alternatives, results["num_alternatives"]),
+         np.searchsorted(voters, results["num_voters"])] = results["probabilities"][:, 1]
+    return voters, alternatives, grid
+
+
+def surfaceTitle(name, results):
+    '''
+    Title of the surface and heatmap of a rule, with the number of simulations of the simulated cells, a single one when
+    every simulated cell has the same, and whether other cells were computed exactly.
+    '''
+    winner = "a Unique " + name + " Winner" if name is not None else "a Unique Winner"
+    exact = np.asarray(results["exact"], dtype=bool)
+    # Exact cells store 0 trials, so only the simulated cells give the range
+    trials = np.unique(results["trials"][~exact])
+    if len(trials) == 0:
+        sample = "Computed Exactly"
+    elif len(trials) == 1:
+        sample = "Over " + format(int(trials[0]), ",") + " Simulations"
+    else:
+        sample = "Over " + format(int(trials.min()), ",") + " to " + format(int(trials.max()), ",") + " Simulations"
+    if len(trials) and exact.any():
+        sample += " or Computed Exactly"
+    return "Percentage of Times " + winner + " Occured with Variable\nVoters and Alternatives " + sample
+
+
+def drawSurface(fig, voters, alternatives, grid, title, zlabel=None):
+    '''
+    Draws the grid as a 3D surface over voters and alternatives. Without a zlabel the z axis has no label or ticks.
+    '''
+    ax = fig.add_subplot(111, projection='3d')
+    X, Y = np.meshgrid(voters, alternatives)
+    surface = ax.plot_surface(X, Y, grid, cmap='viridis')
+
+    # Add labels and a color bar
+    ax.set_title(title)
+    ax.set_xlabel('Number of Voters')
+    ax.set_ylabel('Number of Alternatives')
+    if zlabel is not None:
+        ax.set_zlabel(zlabel)
+    else:
+        ax.set_zticks([])
+    fig.colorbar(surface, ax=ax, label='Percentage', location="left")
+
+
+def drawHeatmap(fig, voters, alternatives, grid, title):
+    '''
+    Draws the grid as a heatmap with one tile per cell.
+    '''
+    ax = fig.add_subplot(111)
+    mesh = ax.pcolormesh(voters, alternatives, grid, cmap='viridis', shading='nearest')
+    ax.set_title(title)
+    ax.set_xlabel('Number of Voters')
+    ax.set_ylabel('Number of Alternatives')
+    fig.colorbar(mesh, ax=ax, label='Percentage', location="left", pad=0.15)
+
+
+def drawByVoters(fig, voters, averages):
+    '''
+    Draws the average unique winner rate by number of voters.
+    '''
+    ax = fig.add_subplot(111)
+    ax.plot(voters, averages, c="b")
+    ax.set_title("Average Unique Winner Percentage by Number of Voters", pad=10)
+    ax.set_xlabel("Number of Voters", fontsize=10)
+    ax.set_ylabel("Percentage of Time Unique Winner Occured", fontsize=10)
+
+
+def drawByParity(fig, voters, averages):
+    '''
+    Draws the average unique winner rate by number of voters, with even and odd numbers of voters as separate lines.
+    '''
+    voters = np.asarray(voters)
+    averages = np.asarray(averages)
+    even = voters % 2 == 0
+
+    ax = fig.add_subplot(111)
+    ax.plot(voters[even], averages[even], c='b', label="Even Popultation")
+    ax.plot(voters[~even], averages[~even], c='r', label="Odd Population")
+    ax.legend(loc="center right")
+    ax.set_title("Average Unique Winner Percentage by Number of Voters, By Parity", pad=10)
+    ax.set_xlabel("Number of Voters", fontsize=10)
+    ax.set_ylabel("Percntage of Time Unique Winner Occured", fontsize=10)
+
+
+def figureHash(results, rule, kind):
+    '''
+    Hash of everything a figure is drawn from: the result arrays, the figure's settings and FIGURE_VERSION.
+    '''
+    digest = hashlib.sha256()
+    for field in ("num_alternatives", "num_voters", "trials", "exact", "probabilities"):
+        array = np.ascontiguousarray(results[field])
+        digest.update(field.encode("utf-8") + str(array.dtype).encode("utf-8") + str(array.shape).encode("utf-8"))
+        digest.update(array.tobytes())
+    settings = {key: value for key, value in FIGURES[rule].items() if key not in FIGURE_KINDS or key == kind}
+    digest.update(json.dumps([FIGURE_VERSION, rule, kind, settings], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def storedHash(path):
+    '''
+    Hash recorded in the PNG at path when it was rendered, or None if the file is missing or carries none.
+    '''
+    if not os.path.exists(path):
+        return None
+    with Image.open(path) as image:
+        return image.text.get(HASH_KEY)
+
+
+def renderRule(rule, force=False):
+    '''
+    Renders the figures of one rule to its image folder on the Agg canvas, skipping every figure whose PNG already
+    records the hash of its data. Returns the names of the rendered figures.
+    '''
+    spec = FIGURES[rule]
+    results = loadRuleResults(rule)
+    voters, alternatives, grid = resultGrid(results)
+    averages = np.nanmean(grid, axis=0)
+    title = surfaceTitle(spec["name"], results)
+
+    draw = {
+        "surface": lambda fig: drawSurface(fig, voters, alternatives, grid, title, spec["zlabel"]),
+        "heatmap": lambda fig: drawHeatmap(fig, voters, alternatives, grid, title),
+        "by_voters": lambda fig: drawByVoters(fig, voters, averages),
+        "by_parity": lambda fig: drawByParity(fig, voters, averages),
+    }
+    styles = {"by_voters": "ggplot", "by_parity": "ggplot"}
+
+    rendered = []
+    for kind in FIGURE_KINDS:
+        path = os.path.join(ROOT, spec["directory"], spec[kind])
+        digest = figureHash(results, rule, kind)
+        if not force and storedHash(path) == digest:
+            continue
+
+        # Figures built without pyplot draw on the Agg canvas and need no display
+        with matplotlib.style.context(styles.get(kind, "default")):
+            fig = Figure()
+            draw[kind](fig)
+            fig.savefig(path, bbox_inches="tight", metadata={HASH_KEY: digest})
+        rendered.append(spec[kind])
+
+    return rendered
+
+
+def renderFigures(rules=tuple(RESULT_FILES), workers=None, force=False):
+    '''
+    Renders the figures of every rule, one rule per worker process, skipping the ones whose data is unchanged since
+    they were rendered. workers=1 renders in the current process. Returns the names of the rendered figures by rule.
+    '''
+    if workers == 1:
+        return {rule: renderRule(rule, force) for rule in rules}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {rule: executor.submit(renderRule, rule, force) for rule in rules}
+        return {rule: future.result() for rule, future in futures.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the figures of every rule from its result file.")
+    parser.add_argument("--rule", action="append", choices=list(RESULT_FILES), dest="rules",
+                        help="rule to render, may be repeated, all of them by default")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes, one per core by default")
+    parser.add_argument("--force", action="store_true",
+                        help="render every figure even if its data is unchanged")
+    args = parser.parse_args()
+
+    for rule, rendered in renderFigures(tuple(args.rules or RESULT_FILES), args.workers, args.force).items():
+        print(rule + ":", ", ".join(rendered) if rendered else "up to date")
@@ -0,0 +1,132 @@
+# Import dependencies
+import numpy as np
+
+from Shared.Compiled import NUMBA_AVAILABLE, compiledIrvElimination
+from Shared.Profiles import countBallots, runningBallots
+from Shared.Scoring import countFinalists
+
+
+def numpyIrvElimination(profiles, weights=None):
+    '''
+    Runs instant runoff on every profile in a batch from generateProfiles at once. Like has_unique_irv_winner, first
+    choice tallies accumulate over the rounds and every alternative tied for the fewest votes is eliminated together.
+    weights, of shape (num_sims, num_voters), optionally counts every ballot that many times.
+    Returns the unique winner of every profile (-1 when the last alternatives were eliminated together) and an int8
+    array of shape (num_sims, num_alternatives) giving the round each alternative was eliminated in (-1 if never).
+    '''
+    profiles = np.asarray(profiles)
+    num_sims, num_voters, num_alternatives = profiles.shape
+    ballots = profiles.reshape(num_sims * num_voters, num_alternatives)
+    num_cells = num_sims * num_alternatives
+
+    # Every ballot's current top choice as a flat (profile, alternative) index, and the rank that choice sits at
+    offsets = np.repeat(np.arange(num_sims) * num_alternatives, num_voters)
+    top_choices = offsets + ballots[:, 0]
+    depths = np.zeros(num_sims * num_voters, dtype=np.intp)
+    weights = np.ravel(weights) if weights is not None else None
+
+    def tally(voters):
+        # First choice votes of the given ballots per (profile, alternative)
+        if weights is None:
+            votes = np.bincount(top_choices[voters], minlength=num_cells)
+        else:
+            votes = np.rint(np.bincount(top_choices[voters], weights[voters], minlength=num_cells)).astype(np.int64)
+        return votes.reshape(num_sims, num_alternatives)
+
+    elimination_rounds = np.full((num_sims, num_alternatives), -1, dtype=np.int8)
+    eliminated = np.zeros((num_sims, num_alternatives), dtype=bool)
+    tallies = np.zeros((num_sims, num_alternatives), dtype=np.int64)
+    first_choice_votes = tally(slice(None))
+
+    # Profiles that still have more than one alternative left
+    running = np.ones(num_sims, dtype=bool)
+    round_number = 0
+    while running.any():
+        tallies[running] += first_choice_votes[running]
+
+        # Eliminate every remaining alternative tied for the fewest votes
+        remaining_tallies = np.where(eliminated | ~running[:, None], np.iinfo(np.int64).max, tallies)
+        newly_eliminated = (remaining_tallies == remaining_tallies.min(axis=1, keepdims=True)) & running[:, None]
+        elimination_rounds[newly_eliminated] = round_number
+        eliminated |= newly_eliminated
+        running &= np.count_nonzero(~eliminated, axis=1) > 1
+        round_number += 1
+
+        # Move ballots whose top choice was eliminated down to their next choice, in profiles still running
+        voters = runningBallots(newly_eliminated, top_choices, running)
+        moved = voters
+        while len(voters):
+            depths[voters] += 1
+            top_choices[voters] = offsets[voters] + ballots[voters, depths[voters]]
+            voters = voters[eliminated.ravel()[top_choices[voters]]]
+
+        first_choice_votes[eliminated] = 0
+        first_choice_votes += tally(moved)
+
+    remaining = ~eliminated
+    winners = np.where(np.count_nonzero(remaining, axis=1) == 1, remaining.argmax(axis=1), -1)
+    return winners, elimination_rounds
+
+
+def numpyIrvWinners(profiles, weights=None):
+    '''
+    Returns the unique winner of every profile from numpyIrvElimination, or -1 when there is none.
+    '''
+    return numpyIrvElimination(profiles, weights)[0]
+
+
+def irvElimination(profiles):
+    '''
+    Same as numpyIrvElimination, with the compiled loop when Numba is installed.
+    '''
+    if NUMBA_AVAILABLE:
+        return compiledIrvElimination(profiles)
+    return numpyIrvElimination(profiles)
+
+
+def irvWinners(profiles):
+    '''
+    Returns the unique instant runoff winner of every profile in a batch from generateProfiles, or -1 when there is
+    none, with the compiled loop when Numba is installed and numpyIrvWinners otherwise.
+    '''
+    return irvElimination(profiles)[0]
+
+
+def unique_irv_winners(profiles):
+    '''
+    Determines whether each profile in a batch from generateProfiles has a unique instant runoff winner.
+    '''
+    return irvWinners(profiles) >= 0
+
+
+def count_irv_winners(profiles):
+    '''
+    Returns the number of tied instant runoff winners of every profile in a batch from generateProfiles, the
+    alternatives left in the last round, 1 being a unique winner.
+    '''
+    return countFinalists(irvElimination(profiles)[1])
+
+
+def irvWinnersFromCounts(counts):
+    '''
+    Same as irvWinners for ranking counts from generateRankingCounts, running each ranking as one ballot weighted by
+    its count.
+    '''
+    counts = np.asarray(counts)
+    return numpyIrvWinners(countBallots(counts), counts)
+
+
+def unique_irv_winners_from_counts(counts):
+    '''
+    Determines whether each profile in a batch of ranking counts from generateRankingCounts has a unique instant
+    runoff winner.
+    '''
+    return irvWinnersFromCounts(counts) >= 0
+
+
+def count_irv_winners_from_counts(counts):
+    '''
+    Same as count_irv_winners for ranking counts from generateRankingCounts.
+    '''
+    counts = np.asarray(counts)
+    return countFinalists(numpyIrvElimination(countBallots(counts), counts)[1])
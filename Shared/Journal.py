@@ -0,0 +1,154 @@
+# Import dependencies
+import json
+import os
+import queue
+import threading
+import numpy as np
+
+from Shared.Accumulator import OutcomeAccumulator
+from Shared.Profiling import phase
+from Shared.Sweep import iterSweep, newSeed
+
+
+def cellEntry(num_alternatives, num_voters, histogram):
+    '''
+    JSON friendly record of one finished cell, a histogram or an OutcomeAccumulator.
+    '''
+    entry = {"num_alternatives": num_alternatives, "num_voters": num_voters,
+             "histogram": np.asarray(histogram).tolist()}
+    if isinstance(histogram, OutcomeAccumulator):
+        entry["statistics"] = {"count": histogram.count, "mean": histogram.mean, "m2": histogram.m2}
+    return entry
+
+
+def entryHistogram(entry):
+    '''
+    Rebuilds the histogram or OutcomeAccumulator of a cellEntry record.
+    '''
+    if "statistics" in entry:
+        return OutcomeAccumulator.fromDict(dict(entry["statistics"], histogram=entry["histogram"]))
+    return np.array(entry["histogram"], dtype=np.int64)
+
+
+class SweepJournal:
+    '''
+    Append-only record of the finished cells of a sweep, so a crashed or preempted sweep can resume where it stopped.
+    The first line holds the sweep settings, every later line one finished cell as JSON. Lines are written and synced
+    to disk by a background thread so the simulations never wait on the disk, and a line cut short by a crash is
+    dropped when the journal is opened again. half_width is the target precision of an adaptive sweep, None for a
+    sweep with a fixed number of simulations per cell, and method the INTERVALS method its precision is measured with.
+    '''
+
+    def __init__(self, path, num_sims, seed=None, half_width=None, method="wilson"):
+        self.path = path
+        self.half_width = half_width
+        self.method = method
+        self.completed = dict()
+        self._queue = queue.Queue()
+        self._error = None
+
+        settings = self._load()
+        if settings is None:
+            # New sweep, draw a seed if none was given and write the settings line first
+            self.seed = seed if seed is not None else newSeed()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._write({"num_sims": num_sims, "seed": self.seed, "half_width": half_width, "method": method})
+        else:
+            # Journals from before the method was recorded used Wilson intervals
+            if settings["num_sims"] != num_sims or settings.get("half_width") != half_width or \
+                    settings.get("method", "wilson") != method or (seed is not None and settings["seed"] != seed):
+                raise ValueError("Journal " + path + " belongs to a sweep with num_sims=" + str(settings["num_sims"]) +
+                                 ", half_width=" + str(settings.get("half_width")) + ", method=" +
+                                 settings.get("method", "wilson") + " and seed=" + str(settings["seed"]) +
+                                 ", delete it to start over")
+            self.seed = settings["seed"]
+            self._file = open(self.path, "a", encoding="utf-8")
+
+        self._writer = threading.Thread(target=self._writeLoop, daemon=True)
+        self._writer.start()
+
+    def _load(self):
+        '''
+        Reads the settings and finished cells of an existing journal, truncating any incomplete last line.
+        '''
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, "r+", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+            # Everything after the last newline was cut short by a crash
+            complete = lines[:-1]
+            f.seek(0)
+            f.truncate(sum(len(line.encode("utf-8")) + 1 for line in complete))
+
+        if not complete:
+            return None
+
+        for line in complete[1:]:
+            entry = json.loads(line)
+            self.completed[(entry["num_alternatives"], entry["num_voters"])] = entryHistogram(entry)
+        return json.loads(complete[0])
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _writeLoop(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            try:
+                self._write(entry)
+            except OSError as error:
+                self._error = error
+
+    def record(self, num_alternatives, num_voters, histogram):
+        '''
+        Queues a finished cell, a histogram or an OutcomeAccumulator, to be appended to the journal.
+        '''
+        self.completed[(num_alternatives, num_voters)] = histogram
+        self._queue.put(cellEntry(num_alternatives, num_voters, histogram))
+
+    def close(self):
+        '''
+        Waits for every queued cell to reach the disk, then closes the journal.
+        '''
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def discard(self):
+        '''
+        Deletes the journal once the sweep's results have been written out.
+        '''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def resumeSweep(simulateCell, cells, num_sims, journal, workers=None, cache=None):
+    '''
+    Like iterSweep, but first yields the cells already finished in the journal and records every newly finished cell
+    in it. The sweep is adaptive when the journal has a half_width, measuring the precision of every cell with the
+    journal's interval method, and reuses the chunks of cache when one is given.
+    '''
+    for num_alternatives, num_voters in cells:
+        if (num_alternatives, num_voters) in journal.completed:
+            yield num_alternatives, num_voters, journal.completed[(num_alternatives, num_voters)]
+
+    remaining = [cell for cell in cells if cell not in journal.completed]
+    sweep = iterSweep(simulateCell, remaining, num_sims, journal.seed, workers, half_width=journal.half_width,
+                      method=journal.method, cache=cache)
+    for num_alternatives, num_voters, histogram in sweep:
+        with phase("journal", (num_alternatives, num_voters)):
+            journal.record(num_alternatives, num_voters, histogram)
+        yield num_alternatives, num_voters, histogram
@@ -0,0 +1,424 @@
+# Import dependencies
+import functools
+import itertools
+import math
+import numpy as np
+
+
+# Largest number of ballot entries generated at once, keeps a batch around 16 MB as int8
+MAX_BATCH_ELEMENTS = 2 ** 24
+
+# Lehmer codes of rankings of up to this many alternatives fit in a uint32, 12! < 2**32 < 13!
+MAX_CODE_ALTERNATIVES = 12
+
+# Codes of rankings of up to this many alternatives are decoded by looking them up in allRankings
+MAX_TABLE_ALTERNATIVES = 8
+
+# Electorates at least this large are drawn as ranking counts once there are more voters than rankings, smaller ones
+# keep drawing every ballot so the results of the usual grid stay reproducible from their seed
+MIN_RANKING_COUNT_VOTERS = 1000
+
+
+def batchSizes(num_sims, num_voters, num_alternatives, max_elements=MAX_BATCH_ELEMENTS):
+    '''
+    Splits num_sims into batch sizes small enough that one batch of profiles holds at most max_elements entries.
+    Example: list(batchSizes(10, 100, 10, max_elements=4000)) = [4, 4, 2].
+    '''
+    batch_size = max(1, max_elements // max(1, num_voters * num_alternatives))
+    while num_sims > 0:
+        size = min(batch_size, num_sims)
+        yield size
+        num_sims -= size
+
+
+def generateProfiles(num_sims, num_voters, num_alternatives, rng=None, culture=None):
+    '''
+    Returns num_sims impartial culture profiles as an int8 array of shape (num_sims, num_voters, num_alternatives).
+    profiles[s, v, r] is the alternative voter v of profile s ranks in position r, so each ballot is a uniform random
+    permutation of range(num_alternatives), the same distribution as generateProfile in every ranked simulation.
+    culture, a dictionary from Shared.Cultures such as {"name": "mallows", "phi": 0.5}, draws the profiles from that
+    culture instead.
+    '''
+    if culture is not None and culture["name"] != "impartial":
+        # The culture samplers build on this function, so they are only imported once needed
+        from Shared.Cultures import sampleProfiles
+        return sampleProfiles(culture, num_sims, num_voters, num_alternatives, rng)
+    rng = np.random.default_rng(rng)
+
+    # Shuffle a copy of the identity ballot for every voter at once
+    identity = np.arange(num_alternatives, dtype=np.int8)
+    return rng.permuted(np.broadcast_to(identity, (num_sims, num_voters, num_alternatives)), axis=-1)
+
+
+@functools.lru_cache(maxsize=None)
+def allRankings(num_alternatives):
+    '''
+    Returns every ranking of the alternatives as a read-only int8 array of shape (num_alternatives!, num_alternatives),
+    in lexicographic order. Example: allRankings(2) = [[0, 1], [1, 0]].
+    '''
+    rankings = np.array(list(itertools.permutations(range(num_alternatives))), dtype=np.int8)
+    rankings.flags.writeable = False
+    return rankings
+
+
+def countAlternatives(counts):
+    '''
+    Returns the number of alternatives of ranking counts from generateRankingCounts, whose last axis has one entry per
+    ranking. Example: countAlternatives(np.zeros((5, 24))) = 4.
+    '''
+    num_rankings = np.shape(counts)[-1]
+    num_alternatives = 1
+    while math.factorial(num_alternatives) < num_rankings:
+        num_alternatives += 1
+    if math.factorial(num_alternatives) != num_rankings:
+        raise ValueError("Ranking counts need one entry per ranking, got " + str(num_rankings))
+    return num_alternatives
+
+
+def useRankingCounts(num_voters, num_alternatives):
+    '''
+    Returns whether a cell is cheaper to simulate with generateRankingCounts than with generateProfiles, which is when
+    the electorate is large and there are more voters than rankings.
+    '''
+    return num_voters >= MIN_RANKING_COUNT_VOTERS and num_voters > math.factorial(num_alternatives)
+
+
+def rankedBatchSizes(num_sims, num_voters, num_alternatives):
+    '''
+    Same as batchSizes for the ranked profiles of one cell, sized for ranking counts when useRankingCounts picks them,
+    since the count kernels expand every profile into one weighted ballot per ranking.
+    '''
+    if useRankingCounts(num_voters, num_alternatives):
+        return batchSizes(num_sims, math.factorial(num_alternatives), num_alternatives)
+    return batchSizes(num_sims, num_voters, num_alternatives)
+
+
+def generateRankingCounts(num_sims, num_voters, num_alternatives, rng=None, culture=None):
+    '''
+    Returns num_sims impartial culture profiles as ranking counts, an int64 array of shape (num_sims,
+    num_alternatives!) where counts[s, t] is the number of voters of profile s holding ranking allRankings[t]. Under
+    impartial culture the counts are multinomial and fully describe the profile for every anonymous rule, so a profile
+    costs the same to draw whatever the number of voters. culture draws the counts from another culture, like in
+    generateProfiles.
+    '''
+    if culture is not None and culture["name"] != "impartial":
+        from Shared.Cultures import sampleRankingCounts
+        return sampleRankingCounts(culture, num_sims, num_voters, num_alternatives, rng)
+    rng = np.random.default_rng(rng)
+    num_rankings = math.factorial(num_alternatives)
+    return rng.multinomial(num_voters, np.full(num_rankings, 1 / num_rankings), size=num_sims)
+
+
+def countBallots(counts):
+    '''
+    Turns ranking counts from generateRankingCounts into a batch in the generateProfiles layout with one ballot per
+    ranking, to be weighted by counts. Returns a read-only view of shape (num_sims, num_alternatives!,
+    num_alternatives).
+    '''
+    counts = np.asarray(counts)
+    rankings = allRankings(countAlternatives(counts))
+    return np.broadcast_to(rankings, counts.shape + rankings.shape[-1:])
+
+
+def runningBallots(cells, choices, running):
+    '''
+    Returns the indices of the ballots, of the profiles still running, whose current choice is one of cells, a boolean
+    array of shape (num_sims, num_alternatives). choices holds every ballot's current choice as a flat (profile,
+    alternative) index, profile by profile. Once at most half the profiles run, only their ballots are looked at.
+    '''
+    cells = cells & running[:, None]
+    rows = np.flatnonzero(running)
+    # Copying the choices of the running profiles only pays off once many have finished
+    if 2 * len(rows) > len(running):
+        return np.flatnonzero(cells.ravel()[choices])
+    num_voters = len(choices) // len(running)
+    hit_rows, positions = np.nonzero(cells.ravel()[choices.reshape(len(running), num_voters)[rows]])
+    return rows[hit_rows] * num_voters + positions
+
+
+def approvalMaskDtype(num_alternatives):
+    '''
+    Smallest unsigned integer type with one bit per alternative. Example: approvalMaskDtype(10) = np.uint16.
+    '''
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if num_alternatives <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError("Approval ballots support at most 64 alternatives, got " + str(num_alternatives))
+
+
+@functools.lru_cache(maxsize=None)
+def approvalMaskDistribution(num_alternatives):
+    '''
+    Returns every approval ballot bitmask and its probability when a voter approves a uniform number of alternatives in
+    [1, num_alternatives-1], chosen uniformly without replacement.
+    '''
+    masks = np.arange(2 ** num_alternatives, dtype=np.int64)
+    sizes = np.array([bin(mask).count("1") for mask in range(2 ** num_alternatives)])
+    allowed = (sizes >= 1) & (sizes <= num_alternatives - 1)
+
+    # Each size is equally likely, then each subset of that size is equally likely
+    subsets_per_size = np.array([math.comb(num_alternatives, size) for size in sizes])
+    probabilities = np.where(allowed, 1 / ((num_alternatives - 1) * subsets_per_size), 0.0)
+    return masks[allowed].astype(approvalMaskDtype(num_alternatives)), probabilities[allowed]
+
+
+def generateApprovalProfiles(num_sims, num_voters, num_alternatives, rng=None, culture=None):
+    '''
+    Returns num_sims approval profiles as an array of shape (num_sims, num_voters) holding one bitmask per voter, where
+    bit a of profiles[s, v] is set if voter v of profile s approves alternative a. Matches ApprovalVotingWinnerSim: each
+    voter approves a uniform number of alternatives in [1, num_alternatives-1], chosen uniformly without replacement.
+    Under another culture, see generateProfiles, a voter approves that many alternatives at the top of a ranking drawn
+    from the culture.
+    '''
+    rng = np.random.default_rng(rng)
+    impartial = culture is None or culture["name"] == "impartial"
+
+    # Draw the bitmasks straight from their distribution while the table of all 2^m ballots stays small
+    if num_alternatives <= 16 and impartial:
+        masks, probabilities = approvalMaskDistribution(num_alternatives)
+        return rng.choice(masks, size=(num_sims, num_voters), p=probabilities)
+
+    # Otherwise a voter approving k alternatives approves the first k of a random ranking
+    positions = rankPositions(generateProfiles(num_sims, num_voters, num_alternatives, rng, culture))
+    sizes = rng.integers(1, num_alternatives, size=(num_sims, num_voters, 1), endpoint=False)
+    bits = (np.uint64(1) << np.arange(num_alternatives, dtype=np.uint64)).astype(approvalMaskDtype(num_alternatives))
+    return np.bitwise_or.reduce(np.where(positions < sizes, bits, 0).astype(bits.dtype), axis=-1)
+
+
+def approvalBits(profiles, num_alternatives):
+    '''
+    Unpacks approval bitmasks from generateApprovalProfiles into a boolean array with a trailing axis of length
+    num_alternatives. Example: approvalBits(np.array([5]), 3) = [[True, False, True]].
+    '''
+    profiles = np.asarray(profiles)
+    return (profiles[..., None] >> np.arange(num_alternatives, dtype=profiles.dtype)) & 1 == 1
+
+
+def generateRangeProfiles(num_sims, num_voters, num_alternatives, rng=None, max_score=9):
+    '''
+    Returns num_sims range voting profiles as an int8 array of shape (num_sims, num_voters, num_alternatives), where
+    profiles[s, v, a] is the score in [0, max_score] voter v of profile s gives alternative a. Matches
+    RangeVotingWinnerSim: every score is drawn independently and uniformly.
+    '''
+    rng = np.random.default_rng(rng)
+    return rng.integers(0, max_score, size=(num_sims, num_voters, num_alternatives), dtype=np.int8, endpoint=True)
+
+
+def toBallots(profile):
+    '''
+    Converts one profile from generateProfiles into the list of lists of alternative labels used by the original
+    winner checks. Example: toBallots(np.array([[1, 0], [0, 1]])) = [['1', '0'], ['0', '1']].
+    '''
+    return [[str(alternative) for alternative in ballot] for ballot in profile.tolist()]
+
+
+def toApprovalBallots(profile):
+    '''
+    Converts one profile from generateApprovalProfiles into the list of lists of approved alternative labels used by
+    has_unique_approval_winner. Example: toApprovalBallots(np.array([1, 3])) = [['0'], ['0', '1']].
+    '''
+    return [[str(alternative) for alternative in range(mask.bit_length()) if mask >> alternative & 1]
+            for mask in profile.tolist()]
+
+
+def rankPositions(profiles):
+    '''
+    Inverts ranked profiles from generateProfiles: positions[..., v, a] is the position voter v ranks alternative a in.
+    Example: rankPositions(np.array([[2, 0, 1]])) = [[1, 2, 0]].
+    '''
+    if isinstance(profiles, RankedProfiles):
+        return profiles.positions
+    profiles = np.asarray(profiles)
+    positions = np.empty_like(profiles)
+    ranks = np.broadcast_to(np.arange(profiles.shape[-1], dtype=profiles.dtype), profiles.shape)
+    np.put_along_axis(positions, profiles.astype(np.intp), ranks, axis=-1)
+    return positions
+
+
+def lehmerCodes(rankings):
+    '''
+    Encodes rankings along the last axis, such as the ballots of generateProfiles, as their index in allRankings: the
+    Lehmer code read in the factorial number system. Returns a uint32 array without the last axis.
+    Example: lehmerCodes(np.array([[0, 1, 2], [1, 0, 2], [2, 1, 0]])) = [0, 2, 5].
+    '''
+    rankings = np.asarray(rankings)
+    num_alternatives = rankings.shape[-1]
+    if num_alternatives > MAX_CODE_ALTERNATIVES:
+        raise ValueError("Lehmer codes support at most " + str(MAX_CODE_ALTERNATIVES) + " alternatives, got " +
+                         str(num_alternatives))
+
+    codes = np.zeros(rankings.shape[:-1], dtype=np.uint32)
+    for position in range(num_alternatives - 1):
+        # Each digit counts the alternatives ranked further down with a smaller label
+        digits = np.count_nonzero(rankings[..., position + 1:] < rankings[..., position, None], axis=-1)
+        codes += (digits * math.factorial(num_alternatives - 1 - position)).astype(np.uint32)
+    return codes
+
+
+def decodeRankings(codes, num_alternatives):
+    '''
+    Inverse of lehmerCodes: returns the int8 ranking of every code, with a trailing axis of length num_alternatives.
+    Example: decodeRankings(np.array([0, 5]), 3) = [[0, 1, 2], [2, 1, 0]].
+    '''
+    codes = np.asarray(codes)
+    if num_alternatives <= MAX_TABLE_ALTERNATIVES:
+        return allRankings(num_alternatives)[codes.astype(np.intp)]
+
+    rankings = np.empty(codes.shape + (num_alternatives,), dtype=np.int8)
+    available = np.ones(codes.shape + (num_alternatives,), dtype=bool)
+    remainders = codes.astype(np.int64)
+    for position in range(num_alternatives):
+        digits, remainders = np.divmod(remainders, math.factorial(num_alternatives - 1 - position))
+
+        # The alternative in this position is the digits-th smallest label not placed yet
+        chosen = np.argmax(np.cumsum(available, axis=-1) > digits[..., None], axis=-1)
+        rankings[..., position] = chosen
+        np.put_along_axis(available, chosen[..., None], False, axis=-1)
+    return rankings
+
+
+class RankedProfiles:
+    '''
+    Compact batch of ranked profiles, stored either as the int8 rankings of generateProfiles (rankings[s, v, r] is the
+    alternative voter v of profile s ranks in position r) or as one uint32 Lehmer code per voter. The other forms,
+    including the inverse positions[s, v, a] of rankPositions, are derived on first use and cached as read-only arrays
+    that are handed out without copies. np.asarray(profiles) is the rankings, so every batched kernel accepts a
+    RankedProfiles in place of an array. A profile of 100 voters and 10 alternatives takes 1000 bytes of rankings or
+    400 bytes of codes, against about 1000 strings in the lists of lists of the original simulations.
+    '''
+
+    def __init__(self, rankings=None, codes=None, num_alternatives=None):
+        if (rankings is None) == (codes is None):
+            raise ValueError("RankedProfiles needs either rankings or codes")
+        if rankings is not None:
+            rankings = self._readOnly(np.asarray(rankings, dtype=np.int8))
+            num_alternatives = rankings.shape[-1]
+        elif num_alternatives is None:
+            raise ValueError("RankedProfiles built from codes needs num_alternatives")
+        else:
+            codes = self._readOnly(np.asarray(codes, dtype=np.uint32))
+        self.num_alternatives = num_alternatives
+        self._stored = "rankings" if rankings is not None else "codes"
+        self._rankings = rankings
+        self._codes = codes
+        self._positions = None
+
+    @staticmethod
+    def _readOnly(array):
+        array = array.view()
+        array.flags.writeable = False
+        return array
+
+    @classmethod
+    def fromCodes(cls, codes, num_alternatives):
+        '''
+        Builds profiles from Lehmer codes of shape (num_sims, num_voters), see lehmerCodes.
+        '''
+        return cls(codes=codes, num_alternatives=num_alternatives)
+
+    @classmethod
+    def fromBallots(cls, profile):
+        '''
+        Builds a batch of one profile from the lists of lists of alternative labels used by the original winner checks.
+        Example: RankedProfiles.fromBallots([['1', '0'], ['0', '1']]).rankings = [[[1, 0], [0, 1]]].
+        '''
+        return cls(np.array([[[int(alternative) for alternative in ballot] for ballot in profile]], dtype=np.int8))
+
+    @classmethod
+    def generate(cls, num_sims, num_voters, num_alternatives, rng=None):
+        '''
+        Draws num_sims impartial culture profiles like generateProfiles. With up to MAX_CODE_ALTERNATIVES alternatives
+        every voter gets a uniform Lehmer code, the same distribution as a uniform random ranking.
+        '''
+        rng = np.random.default_rng(rng)
+        if num_alternatives > MAX_CODE_ALTERNATIVES:
+            return cls(generateProfiles(num_sims, num_voters, num_alternatives, rng))
+        codes = rng.integers(0, math.factorial(num_alternatives), size=(num_sims, num_voters), dtype=np.uint32)
+        return cls.fromCodes(codes, num_alternatives)
+
+    @property
+    def rankings(self):
+        '''
+        int8 array of shape (num_sims, num_voters, num_alternatives) of the alternative at every position.
+        '''
+        if self._rankings is None:
+            self._rankings = self._readOnly(decodeRankings(self._codes, self.num_alternatives))
+        return self._rankings
+
+    @property
+    def positions(self):
+        '''
+        int8 array of shape (num_sims, num_voters, num_alternatives) of the position of every alternative.
+        '''
+        if self._positions is None:
+            self._positions = self._readOnly(rankPositions(self.rankings))
+        return self._positions
+
+    @property
+    def codes(self):
+        '''
+        uint32 array of shape (num_sims, num_voters) of the Lehmer code of every ballot.
+        '''
+        if self._codes is None:
+            self._codes = self._readOnly(lehmerCodes(self._rankings))
+        return self._codes
+
+    @property
+    def shape(self):
+        stored = self._rankings if self._rankings is not None else self._codes
+        return stored.shape[:2] + (self.num_alternatives,)
+
+    @property
+    def nbytes(self):
+        '''
+        Bytes held by the stored and cached forms.
+        '''
+        return sum(array.nbytes for array in (self._rankings, self._codes, self._positions) if array is not None)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        '''
+        Selects profiles of the batch, keeping the stored and cached forms. An integer selects a batch of one profile.
+        '''
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 or None)
+        selected = RankedProfiles.__new__(RankedProfiles)
+        selected.num_alternatives = self.num_alternatives
+        selected._stored = self._stored
+        selected._rankings, selected._codes, selected._positions = [
+            array[index] if array is not None else None for array in (self._rankings, self._codes, self._positions)]
+        return selected
+
+    def __array__(self, dtype=None, copy=None):
+        '''
+        The rankings, following NumPy's copy protocol: copy=True always copies, copy=False raises ValueError when the
+        rankings would have to be decoded from the codes or converted to dtype.
+        '''
+        converts = dtype is not None and np.dtype(dtype) != np.int8
+        if copy is False and (converts or self._rankings is None):
+            raise ValueError("RankedProfiles cannot be converted to an array without a copy")
+        if converts:
+            return self.rankings.astype(dtype)
+        return self.rankings.copy() if copy else self.rankings
+
+    def rankingCounts(self):
+        '''
+        Returns the number of voters holding each ranking of every profile, in the layout of generateRankingCounts.
+        '''
+        num_rankings = math.factorial(self.num_alternatives)
+        cells = self.codes.astype(np.int64) + (np.arange(len(self)) * num_rankings)[:, None]
+        return np.bincount(cells.ravel(), minlength=len(self) * num_rankings).reshape(len(self), num_rankings)
+
+    def toBallots(self, index=0):
+        '''
+        Converts one profile into the lists of lists of alternative labels used by the original winner checks.
+        '''
+        return toBallots(self[index].rankings[0])
+
+    def __repr__(self):
+        forms = {"rankings": self._rankings, "codes": self._codes, "positions": self._positions}
+        cached = [name for name, array in forms.items() if array is not None and name != self._stored]
+        return ("RankedProfiles(shape=" + str(self.shape) + ", stored as " + self._stored + ", cached "
+                + (", ".join(cached) if cached else "nothing") + ")")
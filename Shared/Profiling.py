@@ -0,0 +1,146 @@
+# Import dependencies
+import contextlib
+import json
+import os
+import time
+
+
+# Setting this environment variable to anything but 0 turns profiling on, like the --profile flag of the scripts
+PROFILE_ENV = "SWEEP_PROFILE"
+
+
+class _PhaseTimer:
+    '''
+    Context manager adding the wall time of its block to one phase of a PhaseProfiler.
+    '''
+
+    __slots__ = ("profiler", "name", "cell", "start")
+
+    def __init__(self, profiler, name, cell):
+        self.profiler = profiler
+        self.name = name
+        self.cell = cell
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, time.perf_counter() - self.start, cell=self.cell)
+
+
+class PhaseProfiler:
+    '''
+    Cumulative wall time and call count of each phase of a sweep (profile generation, winner determination, output and
+    so on) per (num_alternatives, num_voters) cell. Phases are timed per batch rather than per simulation, so leaving
+    it on costs well under a percent, and when it is off phase() hands back a shared no-op context.
+    Worker processes collect() their timings and the sweep merge()s them into the profiler of the main process.
+    '''
+
+    def __init__(self, enabled=None):
+        self.enabled = os.environ.get(PROFILE_ENV, "0") != "0" if enabled is None else enabled
+        self.cell = None
+        self.timings = dict()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def phase(self, name, cell=None):
+        '''
+        Context manager timing its block as one call of phase name, in cell or else the current cell.
+        '''
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _PhaseTimer(self, name, cell)
+
+    def add(self, name, seconds, calls=1, cell=None):
+        key = (cell if cell is not None else self.cell, name)
+        total = self.timings.get(key)
+        if total is None:
+            self.timings[key] = [seconds, calls]
+        else:
+            total[0] += seconds
+            total[1] += calls
+
+    def collect(self):
+        '''
+        Returns the timings gathered so far as a list of (cell, phase, seconds, calls) and clears them.
+        '''
+        snapshot = [(cell, name, seconds, calls) for (cell, name), (seconds, calls) in self.timings.items()]
+        self.timings = dict()
+        return snapshot
+
+    def merge(self, snapshot):
+        '''
+        Adds timings from collect(), for example those of a worker process.
+        '''
+        for cell, name, seconds, calls in snapshot:
+            self.add(name, seconds, calls, tuple(cell) if cell is not None else None)
+
+    def phaseTotals(self):
+        '''
+        Returns the total seconds and calls of each phase over all cells.
+        '''
+        totals = dict()
+        for (cell, name), (seconds, calls) in self.timings.items():
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += calls
+        return totals
+
+    def summary(self, slowest=10):
+        '''
+        Formats a table of the time spent in each phase, followed by the slowest cells.
+        '''
+        totals = self.phaseTotals()
+        overall = sum(seconds for seconds, calls in totals.values()) or 1.0
+        lines = ["{:<16} {:>12} {:>10} {:>14} {:>7}".format("phase", "seconds", "calls", "ms per call", "share")]
+        for name, (seconds, calls) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            lines.append("{:<16} {:>12.3f} {:>10} {:>14.3f} {:>6.1f}%".format(
+                name, seconds, calls, 1000 * seconds / calls, 100 * seconds / overall))
+
+        cells = dict()
+        for (cell, name), (seconds, calls) in self.timings.items():
+            if cell is not None:
+                cells[cell] = cells.get(cell, 0.0) + seconds
+        if cells:
+            lines.append("")
+            lines.append("{:<16} {:>12}".format("slowest cells", "seconds"))
+            for cell, seconds in sorted(cells.items(), key=lambda item: -item[1])[:slowest]:
+                lines.append("{:<16} {:>12.3f}".format("m=" + str(cell[0]) + " n=" + str(cell[1]), seconds))
+        return "\n".join(lines)
+
+    def writeTrace(self, path):
+        '''
+        Writes every (cell, phase) timing as JSON, one record per entry.
+        '''
+        records = [{"num_alternatives": cell[0] if cell is not None else None,
+                    "num_voters": cell[1] if cell is not None else None,
+                    "phase": name, "seconds": seconds, "calls": calls}
+                   for (cell, name), (seconds, calls) in sorted(self.timings.items(), key=lambda item: str(item[0]))]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"phases": {name: {"seconds": seconds, "calls": calls}
+                                  for name, (seconds, calls) in self.phaseTotals().items()},
+                       "timings": records}, f, indent=1)
+            f.write("\n")
+
+
+# Profiler of the current process, shared by the sweep and the simulation scripts
+PROFILER = PhaseProfiler()
+
+
+def phase(name, cell=None):
+    '''
+    Times a block as one call of phase name in PROFILER. Example: with phase("generate"): ...
+    '''
+    return PROFILER.phase(name, cell)
+
+
+def reportProfile(trace_path):
+    '''
+    Prints the summary table and writes the trace to trace_path when profiling is on.
+    '''
+    if PROFILER.enabled:
+        print(PROFILER.summary())
+        PROFILER.writeTrace(trace_path)
+        print("Profile trace written to", trace_path)
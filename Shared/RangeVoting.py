@@ -0,0 +1,86 @@
+# Import dependencies
+import functools
+import math
+import numpy as np
+
+from Shared.Scoring import countMaxima, uniqueMaxima
+
+
+# Largest support convolved directly, longer distributions are raised to a power with the FFT
+DIRECT_CONVOLUTION_LIMIT = 4096
+
+
+@functools.lru_cache(maxsize=128)
+def scoreSumDistribution(num_voters, max_score=9):
+    '''
+    Returns the distribution of one alternative's total score when num_voters voters each give it a uniform score in
+    [0, max_score], as an array where entry s is the probability the total is s.
+    '''
+    base = np.full(max_score + 1, 1 / (max_score + 1))
+    support = num_voters * max_score + 1
+
+    if support <= DIRECT_CONVOLUTION_LIMIT:
+        # Raise the single voter polynomial to the num_voters power by repeated squaring
+        distribution = np.ones(1)
+        power = base
+        remaining = num_voters
+        while remaining:
+            if remaining & 1:
+                distribution = np.convolve(distribution, power)
+            remaining >>= 1
+            if remaining:
+                power = np.convolve(power, power)
+        return distribution
+
+    # Pad to a power of two at least as long as the result so the circular convolution does not wrap around
+    size = 1 << (support - 1).bit_length()
+    distribution = np.fft.irfft(np.fft.rfft(base, size) ** num_voters, size)[:support]
+    distribution = np.clip(distribution, 0, None)
+    return distribution / distribution.sum()
+
+
+def rangeWinners(profiles):
+    '''
+    Returns the unique range voting winner of every profile in a batch from generateRangeProfiles, or -1 when the
+    highest totals are tied.
+    '''
+    return uniqueMaxima(np.asarray(profiles).sum(axis=1, dtype=np.int64))
+
+
+def unique_range_winners(profiles):
+    '''
+    Determines whether each profile in a batch from generateRangeProfiles has a unique range voting winner.
+    '''
+    return rangeWinners(profiles) >= 0
+
+
+def count_range_winners(profiles):
+    '''
+    Returns the number of alternatives tied for the highest total of every profile in a batch from
+    generateRangeProfiles, 1 being a unique winner.
+    '''
+    return countMaxima(np.asarray(profiles).sum(axis=1, dtype=np.int64))
+
+
+def exactRangeWinnerProbability(num_voters, num_alternatives, max_score=9):
+    '''
+    Returns the exact probability that a range voting profile from generateRangeProfiles has a unique winner. Every
+    alternative's total is an independent draw from scoreSumDistribution, so one alternative is the unique maximum with
+    probability num_alternatives * sum over s of P(S = s) * P(S < s) ** (num_alternatives - 1).
+    '''
+    distribution = scoreSumDistribution(num_voters, max_score)
+    below = np.concatenate(([0.0], np.cumsum(distribution)[:-1]))
+    return min(1.0, float(num_alternatives * np.sum(distribution * below ** (num_alternatives - 1))))
+
+
+def exactRangeWinnerDistribution(num_voters, num_alternatives, max_score=9):
+    '''
+    Returns the exact distribution of the number of alternatives tied for the highest total of a profile from
+    generateRangeProfiles, as a dictionary like exactDistribution. Exactly k given alternatives share the highest total
+    s with probability P(S = s) ** k * P(S < s) ** (num_alternatives - k), for any of comb(num_alternatives, k) sets.
+    '''
+    distribution = scoreSumDistribution(num_voters, max_score)
+    below = np.concatenate(([0.0], np.cumsum(distribution)[:-1]))
+    return {k: min(1.0, float(math.comb(num_alternatives, k) *
+                              np.sum(distribution ** k * below ** (num_alternatives - k))))
+            for k in range(1, num_alternatives + 1)}
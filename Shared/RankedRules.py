@@ -0,0 +1,35 @@
+# Import dependencies
+import numpy as np
+
+from Shared.Condorcet import condorcetWinners
+from Shared.Coombs import coombsWinners
+from Shared.InstantRunoff import irvWinners
+from Shared.Scoring import bordaWinners
+
+
+# Winner kernels of the ranked rules, each maps a batch from generateProfiles to a winner per profile or -1
+RANKED_RULES = {
+    "condorcet": condorcetWinners,
+    "borda": bordaWinners,
+    "irv": irvWinners,
+    "coombs": coombsWinners,
+}
+
+
+def rankedRuleWinners(profiles, rules=RANKED_RULES):
+    '''
+    Evaluates every ranked rule on the same batch of profiles. Returns an int array of shape (num_sims, len(rules))
+    holding each rule's unique winner of each profile, or -1, with the rules in the order of the rules dictionary.
+    '''
+    return np.stack([kernel(profiles) for kernel in rules.values()], axis=1)
+
+
+def agreementCounts(winners):
+    '''
+    Given winners from rankedRuleWinners, returns an int array of shape (num_rules, num_rules) where entry [i, j]
+    counts the profiles in which rules i and j both have a unique winner and it is the same alternative. The diagonal
+    counts the profiles in which each rule has a unique winner.
+    '''
+    has_winner = winners >= 0
+    agree = (winners[:, :, None] == winners[:, None, :]) & has_winner[:, :, None]
+    return np.count_nonzero(agree, axis=0).astype(np.int64)
@@ -0,0 +1,197 @@
+# Import dependencies
+import csv
+import functools
+import importlib.util
+import os
+import numpy as np
+
+
+# Arrays of a result file, one entry per (num_alternatives, num_voters) cell of a single rule:
+#   num_alternatives, num_voters  int64 (cells,)
+#   trials                        int64 (cells,)     simulations of the cell, 0 for exact cells
+#   successes                     int64 (cells,)     simulations with a unique winner
+#   histograms                    int64 (cells, k)   simulations with each number k of tied winners (of Condorcet
+#                                                    winners for condorcet), k = 1 being a unique winner
+#   exact                         bool (cells,)      whether the cell was computed exactly instead of simulated
+#   probabilities                 float64 (cells, k) probability of each outcome, exact or histograms / trials
+# plus the scalars rule (str) and seed (decimal str, as SeedSequence entropy can exceed 64 bits, -1 when unknown)
+RESULT_FIELDS = ("num_alternatives", "num_voters", "trials", "successes", "histograms", "exact", "probabilities")
+
+# Root of the repository, the result files below are relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Result file of every rule and the num_sims its legacy csv was simulated with
+RESULT_FILES = {
+    "approval": ("Approval Voting/ApprovalVotingData.npz", 10000),
+    "borda": ("Borda/BordaData.npz", 10000),
+    "condorcet": ("Condorcet/CondorcetData.npz", 100000),
+    "coombs": ("Coombs/CoombsData.npz", 10000),
+    "irv": ("Instant Runoff/InstantRunoffData.npz", 10000),
+    "range": ("Range Voting/RangeVotingData.npz", 10000),
+}
+
+# Simulation script of every rule of RESULT_FILES, relative to ROOT
+SIMULATIONS = {
+    "approval": "Approval Voting/ApprovalVotingWinnerSim.py",
+    "borda": "Borda/BordaWinnerSim.py",
+    "condorcet": "Condorcet/CondorcetWinnerSim.py",
+    "coombs": "Coombs/CoombsWinnerSim.py",
+    "irv": "Instant Runoff/InstantRunoffWinnerSim.py",
+    "range": "Range Voting/RangeVotingWinnerSim.py",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def loadSimulation(rule):
+    '''
+    Imports the simulation script of a rule by path, since the script folders have spaces in their names. Every rule is
+    imported once and the module is shared by the sweeps, the shards, the checks and the benchmarks.
+    '''
+    spec = importlib.util.spec_from_file_location(rule + "WinnerSim", os.path.join(ROOT, SIMULATIONS[rule]))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _padColumns(rows, width, dtype):
+    padded = np.zeros((len(rows), width), dtype=dtype)
+    for i, row in enumerate(rows):
+        padded[i, :len(row)] = row
+    return padded
+
+
+def saveResults(path, rule, cells, histograms, exact=None, seed=None):
+    '''
+    Writes the results of a sweep to an .npz file. histograms maps each simulated cell to its histogram of outcome
+    counts, exact maps each exactly computed cell to a dictionary of outcome probabilities. Rows follow the order of
+    cells.
+    '''
+    exact = exact if exact is not None else dict()
+    rows = []
+    for cell in cells:
+        if cell in exact:
+            distribution = exact[cell]
+            row = np.zeros(max(distribution) + 1)
+            row[list(distribution)] = list(distribution.values())
+            rows.append((cell, np.zeros(0, dtype=np.int64), row, True))
+        else:
+            histogram = np.asarray(histograms[cell], dtype=np.int64)
+            rows.append((cell, histogram, histogram / histogram.sum(), False))
+
+    width = max(2, max(len(probabilities) for cell, histogram, probabilities, is_exact in rows))
+    counts = _padColumns([histogram for cell, histogram, probabilities, is_exact in rows], width, np.int64)
+    np.savez(
+        path,
+        rule=np.array(rule),
+        seed=np.array(str(seed if seed is not None else -1)),
+        num_alternatives=np.array([cell[0] for cell in cells], dtype=np.int64),
+        num_voters=np.array([cell[1] for cell in cells], dtype=np.int64),
+        trials=counts.sum(axis=1),
+        successes=counts[:, 1].copy(),
+        histograms=counts,
+        exact=np.array([is_exact for cell, histogram, probabilities, is_exact in rows], dtype=bool),
+        probabilities=_padColumns([probabilities for cell, histogram, probabilities, is_exact in rows], width,
+                                  np.float64),
+    )
+
+
+def importCsvResults(path, rule, num_sims):
+    '''
+    Converts a csv written by a simulation script before result files existed into the arrays of loadResults. The
+    csv only has percentages, so the counts are recovered from the num_sims every cell was simulated with. A csv
+    without a column per number of winners only tells a unique winner apart, so the other simulations go to outcome 0.
+    '''
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    outcome_columns = sorted((int(column.split("_")[0]), column) for column in rows[0] if column.endswith("_winners"))
+    histograms = []
+    for row in rows:
+        if outcome_columns:
+            shares = [float(row[column].rstrip("%")) / 100 for outcome, column in outcome_columns]
+        else:
+            share = float(row["has_winner"].rstrip("%")) / 100
+            shares = [1 - share, share]
+        histograms.append(np.rint(np.array(shares) * num_sims).astype(np.int64))
+
+    cells = [(int(row["num_alternatives"]), int(row["num_voters"])) for row in rows]
+    counts = _padColumns(histograms, max(2, max(len(histogram) for histogram in histograms)), np.int64)
+    trials = counts.sum(axis=1)
+    return {
+        "rule": np.full(len(cells), rule),
+        "seed": np.full(len(cells), -1, dtype=object),
+        "num_alternatives": np.array([cell[0] for cell in cells], dtype=np.int64),
+        "num_voters": np.array([cell[1] for cell in cells], dtype=np.int64),
+        "trials": trials,
+        "successes": counts[:, 1].copy(),
+        "histograms": counts,
+        "exact": np.zeros(len(cells), dtype=bool),
+        "probabilities": counts / trials[:, None],
+    }
+
+
+def loadResults(path, rule=None, num_sims=None):
+    '''
+    Reads a result file written by saveResults into a dictionary of arrays with one entry per cell, rule and seed
+    included. When the .npz file does not exist yet but the csv next to it does, the csv is imported with
+    importCsvResults, which needs rule and num_sims.
+    '''
+    if not os.path.exists(path):
+        csv_path = os.path.splitext(path)[0] + ".csv"
+        if os.path.exists(csv_path) and rule is not None and num_sims is not None:
+            return importCsvResults(csv_path, rule, num_sims)
+        raise FileNotFoundError(path)
+
+    with np.load(path) as stored:
+        results = {field: stored[field] for field in RESULT_FIELDS}
+        num_cells = len(results["num_voters"])
+        results["rule"] = np.full(num_cells, stored["rule"].item())
+        # Seeds are Python ints, stored as text since SeedSequence entropy does not fit an int64
+        results["seed"] = np.full(num_cells, int(stored["seed"].item()), dtype=object)
+    return results
+
+
+def resultBase(rule, variant=""):
+    '''
+    Returns the path of the result file of one of the RESULT_FILES rules without its extension, anchored at ROOT so the
+    scripts write their results, journals and profiles where loadRuleResults and mergeQueue read them, whatever the
+    working directory. variant names other sweeps of the rule. Example: resultBase("borda", "Large") ends in
+    Borda/BordaLargeData.
+    '''
+    return os.path.join(ROOT, RESULT_FILES[rule][0])[:-len("Data.npz")] + variant + "Data"
+
+
+def loadRuleResults(rule):
+    '''
+    Loads the results of one of the RESULT_FILES rules with loadResults.
+    '''
+    path, num_sims = RESULT_FILES[rule]
+    return loadResults(os.path.join(ROOT, path), rule, num_sims)
+
+
+def concatResults(results):
+    '''
+    Stacks the results of several loadResults calls, for example one per rule, into a single dictionary of arrays.
+    '''
+    width = max(result["histograms"].shape[1] for result in results)
+    combined = dict()
+    for field in results[0]:
+        if field in ("histograms", "probabilities"):
+            combined[field] = np.concatenate([np.pad(result[field], ((0, 0), (0, width - result[field].shape[1])))
+                                              for result in results])
+        else:
+            combined[field] = np.concatenate([result[field] for result in results])
+    return combined
+
+
+def resultsFrame(results):
+    '''
+    Turns the arrays of loadResults into a pandas DataFrame with one row per cell and the unique winner rate as a
+    fraction in the unique_winner column.
+    '''
+    import pandas as pd
+
+    frame = pd.DataFrame({field: results[field] for field in ("rule", "num_voters", "num_alternatives", "trials",
+                                                              "successes", "exact")})
+    frame["unique_winner"] = results["probabilities"][:, 1]
+    return frame
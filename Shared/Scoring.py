@@ -0,0 +1,161 @@
+# Import dependencies
+import functools
+import math
+import numpy as np
+
+from Shared.Profiles import allRankings, countAlternatives
+
+
+def bordaWeights(num_alternatives):
+    '''
+    Borda count scoring vector. Example: bordaWeights(4) = [3, 2, 1, 0].
+    '''
+    return np.arange(num_alternatives - 1, -1, -1, dtype=np.int64)
+
+
+def pluralityWeights(num_alternatives):
+    '''
+    Plurality scoring vector. Example: pluralityWeights(4) = [1, 0, 0, 0].
+    '''
+    weights = np.zeros(num_alternatives, dtype=np.int64)
+    weights[0] = 1
+    return weights
+
+
+def antiPluralityWeights(num_alternatives):
+    '''
+    Anti-plurality (veto) scoring vector. Example: antiPluralityWeights(4) = [1, 1, 1, 0].
+    '''
+    weights = np.ones(num_alternatives, dtype=np.int64)
+    weights[-1] = 0
+    return weights
+
+
+def dowdallWeights(num_alternatives):
+    '''
+    Dowdall scoring vector 1, 1/2, 1/3, ... scaled by the least common multiple of 1..num_alternatives so scores stay
+    exact integers and ties are detected reliably. Example: dowdallWeights(4) = [12, 6, 4, 3].
+    '''
+    scale = math.lcm(*range(1, num_alternatives + 1))
+    return np.array([scale // position for position in range(1, num_alternatives + 1)], dtype=np.int64)
+
+
+def positionCounts(profiles):
+    '''
+    Counts how often each alternative is ranked in each position, for every profile in a batch from generateProfiles.
+    Returns an int array of shape (num_sims, num_alternatives, num_alternatives) where counts[s, a, r] is the number of
+    voters in profile s ranking alternative a in position r.
+    '''
+    profiles = np.asarray(profiles)
+    num_sims, num_voters, num_alternatives = profiles.shape
+
+    # Flat index of (profile, alternative, position) for every ballot entry
+    cells = profiles.astype(np.intp) * num_alternatives + np.arange(num_alternatives)
+    cells += (np.arange(num_sims) * num_alternatives ** 2)[:, None, None]
+    counts = np.bincount(cells.ravel(), minlength=num_sims * num_alternatives ** 2)
+    return counts.reshape(num_sims, num_alternatives, num_alternatives)
+
+
+def positionCountsFromCounts(counts):
+    '''
+    Same as positionCounts for ranking counts from generateRankingCounts. Each ranking adds its count to one position
+    of every alternative, which is one product with a (rankings, alternatives * positions) indicator table.
+    '''
+    counts = np.asarray(counts)
+    num_alternatives = countAlternatives(counts)
+
+    # Floating point products are exact for counts below 2**53 and much faster than integer ones
+    position_counts = np.rint(counts @ _positionTable(num_alternatives)).astype(np.int64)
+    return position_counts.reshape(len(counts), num_alternatives, num_alternatives)
+
+
+@functools.lru_cache(maxsize=None)
+def _positionTable(num_alternatives):
+    # table[t, a * num_alternatives + r] is 1 when ranking t puts alternative a in position r
+    rankings = allRankings(num_alternatives)
+    table = np.zeros((len(rankings), num_alternatives, num_alternatives))
+    table[np.arange(len(rankings))[:, None], rankings, np.arange(num_alternatives)] = 1
+    return table.reshape(len(rankings), -1)
+
+
+def positionalScores(counts, weights):
+    '''
+    Given position counts from positionCounts, returns every alternative's score under the scoring vector weights, one
+    weight per position. weights may also be a 2D array of several scoring vectors, in which case the last axis of the
+    result runs over them, so any number of positional rules share a single pass over the ballots.
+    '''
+    return counts @ np.asarray(weights).T
+
+
+def uniqueMaxima(scores):
+    '''
+    Returns the index of the unique highest score in every row of scores, or -1 where the highest score is tied.
+    '''
+    best = scores.max(axis=-1, keepdims=True)
+    is_best = scores == best
+    return np.where(np.count_nonzero(is_best, axis=-1) == 1, is_best.argmax(axis=-1), -1)
+
+
+def countMaxima(scores):
+    '''
+    Returns the number of entries tied for the highest score in every row of scores, 1 where uniqueMaxima finds one.
+    '''
+    return np.count_nonzero(scores == scores.max(axis=-1, keepdims=True), axis=-1)
+
+
+def countFinalists(elimination_rounds):
+    '''
+    Returns the number of alternatives left in the last round of an elimination rule, from the round each alternative
+    was eliminated in (-1 if never): 1 when one alternative is never eliminated, otherwise the number eliminated
+    together in the last round.
+    '''
+    rounds = np.asarray(elimination_rounds, dtype=np.int64)
+    return countMaxima(np.where(rounds < 0, rounds.shape[-1], rounds))
+
+
+def bordaWinners(profiles):
+    '''
+    Returns the unique Borda count winner of every profile in a batch from generateProfiles, or -1 when there is none.
+    '''
+    profiles = np.asarray(profiles)
+    return uniqueMaxima(positionalScores(positionCounts(profiles), bordaWeights(profiles.shape[-1])))
+
+
+def unique_borda_winners(profiles):
+    '''
+    Determines whether each profile in a batch from generateProfiles has a unique Borda count winner.
+    '''
+    return bordaWinners(profiles) >= 0
+
+
+def count_borda_winners(profiles):
+    '''
+    Returns the number of alternatives tied for the highest Borda count of every profile in a batch from
+    generateProfiles, 1 being a unique winner.
+    '''
+    profiles = np.asarray(profiles)
+    return countMaxima(positionalScores(positionCounts(profiles), bordaWeights(profiles.shape[-1])))
+
+
+def bordaWinnersFromCounts(counts):
+    '''
+    Same as bordaWinners for ranking counts from generateRankingCounts.
+    '''
+    counts = np.asarray(counts)
+    return uniqueMaxima(positionalScores(positionCountsFromCounts(counts), bordaWeights(countAlternatives(counts))))
+
+
+def unique_borda_winners_from_counts(counts):
+    '''
+    Determines whether each profile in a batch of ranking counts from generateRankingCounts has a unique Borda count
+    winner.
+    '''
+    return bordaWinnersFromCounts(counts) >= 0
+
+
+def count_borda_winners_from_counts(counts):
+    '''
+    Same as count_borda_winners for ranking counts from generateRankingCounts.
+    '''
+    counts = np.asarray(counts)
+    return countMaxima(positionalScores(positionCountsFromCounts(counts), bordaWeights(countAlternatives(counts))))
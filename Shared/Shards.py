@@ -0,0 +1,249 @@
+# Import dependencies
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import time
+
+from Shared.Adaptive import INTERVALS
+from Shared.Cache import writeJson
+from Shared.Journal import cellEntry, entryHistogram
+from Shared.Results import RESULT_FILES, ROOT, SIMULATIONS, loadSimulation, saveResults
+from Shared.Sweep import gridCells, iterSweep, mergeHistograms, newSeed
+
+
+# Subfolders of a queue: units waiting for a node, units a node is working on and the results of finished units
+QUEUE_FOLDERS = ("pending", "claimed", "done")
+
+# A claimed unit whose node has not reported progress for this many seconds is presumed lost and can be requeued
+DEFAULT_STALE_SECONDS = 3600
+
+
+def _readJson(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _unitFiles(queue, folder):
+    return sorted(name for name in os.listdir(os.path.join(queue, folder)) if name.endswith(".json"))
+
+
+def createQueue(queue, rules, num_alternatives_range, num_voters_range, num_sims, seed=None, half_width=None,
+                chunk_size=None, cells_per_unit=1, method="wilson"):
+    '''
+    Splits the (rule, num_alternatives, num_voters) grid of a sweep into work units of cells_per_unit cells of one
+    rule each, written as files to the pending folder of queue, a folder on a filesystem every node can reach. Every
+    rule gets its own seed, the given one or a fresh one, and every chunk of every cell draws from cellSeedSequence, so
+    the results do not depend on which node ran which unit. Returns the number of units.
+    '''
+    if os.path.exists(os.path.join(queue, "settings.json")):
+        raise ValueError("Queue " + queue + " already exists, delete it to start over")
+    for folder in QUEUE_FOLDERS:
+        os.makedirs(os.path.join(queue, folder), exist_ok=True)
+
+    seeds = {rule: seed if seed is not None else newSeed() for rule in rules}
+    num_units = 0
+    for rule in rules:
+        cells = gridCells(num_alternatives_range, num_voters_range)
+        for start in range(0, len(cells), cells_per_unit):
+            name = rule + "-" + format(start // cells_per_unit, "06d") + ".json"
+            writeJson(os.path.join(queue, "pending", name),
+                      {"rule": rule, "cells": cells[start:start + cells_per_unit]})
+            num_units += 1
+
+    # The settings are written last, nodes only start on a queue that has them
+    writeJson(os.path.join(queue, "settings.json"),
+              {"num_sims": num_sims, "seeds": seeds, "half_width": half_width, "method": method,
+               "chunk_size": chunk_size})
+    return num_units
+
+
+def claimUnit(queue, node):
+    '''
+    Claims one pending unit for node by renaming its file into the claimed folder. A rename within one filesystem is
+    atomic, so when several nodes go for the same unit exactly one succeeds and no locks are needed. Returns the path
+    of the claimed file, or None when no unit is pending.
+    '''
+    pending = _unitFiles(queue, "pending")
+    # Nodes try the units in different orders so they rarely collide
+    random.shuffle(pending)
+    for name in pending:
+        claimed = os.path.join(queue, "claimed", name[:-len(".json")] + "." + node + ".json")
+        try:
+            os.rename(os.path.join(queue, "pending", name), claimed)
+        except FileNotFoundError:
+            continue
+        # The claim's modification time is the node's heartbeat, starting now
+        os.utime(claimed)
+        return claimed
+    return None
+
+
+def runUnit(queue, claimed, settings):
+    '''
+    Simulates every cell of a claimed unit with the simulateCell of its rule and writes the histograms to the done
+    folder. Touches the claim after every cell so other nodes can tell it is still being worked on.
+    '''
+    unit = _readJson(claimed)
+    simulateCell = loadSimulation(unit["rule"]).simulateCell
+    cells = [tuple(cell) for cell in unit["cells"]]
+
+    entries = []
+    sweep = iterSweep(simulateCell, cells, settings["num_sims"], settings["seeds"][unit["rule"]], workers=1,
+                      chunk_size=settings["chunk_size"], half_width=settings["half_width"],
+                      method=settings.get("method", "wilson"))
+    for num_alternatives, num_voters, histogram in sweep:
+        entries.append(cellEntry(num_alternatives, num_voters, histogram))
+        os.utime(claimed)
+
+    name = os.path.basename(claimed).split(".")[0] + ".json"
+    writeJson(os.path.join(queue, "done", name), {"rule": unit["rule"], "cells": entries})
+    try:
+        os.remove(claimed)
+    except FileNotFoundError:
+        # The claim went stale and was requeued meanwhile, whoever reruns it writes the same results
+        pass
+
+
+def workQueue(queue, node=None, max_units=None):
+    '''
+    Claims and runs units until the queue has none pending or max_units are done, and returns how many were run. Run
+    one per core on every node, node names the claims and defaults to the host name and process id.
+    '''
+    settings = _readJson(os.path.join(queue, "settings.json"))
+    node = re.sub(r"[^\w-]", "_", node if node is not None else socket.gethostname() + "-" + str(os.getpid()))
+
+    num_run = 0
+    while max_units is None or num_run < max_units:
+        claimed = claimUnit(queue, node)
+        if claimed is None:
+            break
+        runUnit(queue, claimed, settings)
+        num_run += 1
+    return num_run
+
+
+def requeueStale(queue, stale_seconds=DEFAULT_STALE_SECONDS):
+    '''
+    Moves claimed units whose node has not touched them for stale_seconds back to pending, for nodes that crashed or
+    were preempted. Returns the names of the requeued units.
+    '''
+    requeued = []
+    for name in _unitFiles(queue, "claimed"):
+        claimed = os.path.join(queue, "claimed", name)
+        try:
+            if time.time() - os.path.getmtime(claimed) < stale_seconds:
+                continue
+            unit = name.split(".")[0] + ".json"
+            os.rename(claimed, os.path.join(queue, "pending", unit))
+        except FileNotFoundError:
+            continue
+        requeued.append(unit)
+    return requeued
+
+
+def queueStatus(queue):
+    '''
+    Returns the number of pending, claimed and done units.
+    '''
+    return {folder: len(_unitFiles(queue, folder)) for folder in QUEUE_FOLDERS}
+
+
+def mergeQueue(queue, output=None, partial=False):
+    '''
+    Combines the histograms of every done unit into one result file per rule, the files loadRuleResults and the
+    analysis scripts read, or files of the same names in the output folder. Refuses to merge while units are pending
+    or claimed unless partial is set. Returns the path written for every rule.
+    '''
+    status = queueStatus(queue)
+    if not partial and (status["pending"] or status["claimed"]):
+        raise ValueError("Queue " + queue + " still has " + str(status["pending"]) + " pending and " +
+                         str(status["claimed"]) + " claimed units")
+    settings = _readJson(os.path.join(queue, "settings.json"))
+
+    histograms = dict()
+    for name in _unitFiles(queue, "done"):
+        unit = _readJson(os.path.join(queue, "done", name))
+        for entry in unit["cells"]:
+            cell = (entry["num_alternatives"], entry["num_voters"])
+            histograms.setdefault(unit["rule"], dict()).setdefault(cell, []).append(entryHistogram(entry))
+
+    paths = dict()
+    for rule, cells in histograms.items():
+        path = os.path.join(ROOT, RESULT_FILES[rule][0])
+        if output is not None:
+            path = os.path.join(output, os.path.basename(path))
+        merged = {cell: mergeHistograms(parts) for cell, parts in cells.items()}
+        saveResults(path, rule, sorted(merged), merged, seed=settings["seeds"][rule])
+        paths[rule] = path
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a sweep over several nodes through a work queue in a shared "
+                                                 "folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="split a sweep into work units")
+    create.add_argument("queue", help="queue folder on a filesystem every node can reach")
+    create.add_argument("--rule", action="append", choices=list(SIMULATIONS), dest="rules",
+                        help="rule to sweep, may be repeated, all of them by default")
+    create.add_argument("--alternatives", type=int, nargs=2, default=(2, 10), metavar=("LOW", "HIGH"),
+                        help="range of numbers of alternatives")
+    create.add_argument("--voters", type=int, nargs=2, default=(2, 100), metavar=("LOW", "HIGH"),
+                        help="range of numbers of voters")
+    create.add_argument("--num-sims", type=int, default=10000,
+                        help="simulations per cell, the cap of an adaptive sweep")
+    create.add_argument("--seed", type=int, default=None,
+                        help="root seed of every rule, a fresh one per rule by default")
+    create.add_argument("--half-width", type=float, default=None,
+                        help="simulate each cell until the 95%% interval on its unique winner rate is at most this "
+                             "many percentage points either side")
+    create.add_argument("--interval", choices=list(INTERVALS), default="wilson",
+                        help="interval on the unique winner rate that --half-width bounds")
+    create.add_argument("--chunk-size", type=int, default=None,
+                        help="simulations per chunk of a cell")
+    create.add_argument("--cells-per-unit", type=int, default=1,
+                        help="cells in every work unit")
+
+    work = commands.add_parser("work", help="claim and run units until none are pending")
+    work.add_argument("queue")
+    work.add_argument("--node", default=None,
+                      help="name of this worker in the claims, the host name and process id by default")
+    work.add_argument("--max-units", type=int, default=None,
+                      help="stop after this many units")
+
+    status = commands.add_parser("status", help="count the pending, claimed and done units")
+    status.add_argument("queue")
+
+    requeue = commands.add_parser("requeue", help="return stale claims to the pending units")
+    requeue.add_argument("queue")
+    requeue.add_argument("--stale-seconds", type=float, default=DEFAULT_STALE_SECONDS,
+                         help="seconds without progress after which a claim is stale")
+
+    merge = commands.add_parser("merge", help="write the result file of every rule from the done units")
+    merge.add_argument("queue")
+    merge.add_argument("--output", default=None,
+                       help="folder for the result files, the ones the analysis scripts read by default")
+    merge.add_argument("--partial", action="store_true",
+                       help="merge even though some units are not done")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        half_width = args.half_width / 100 if args.half_width is not None else None
+        num_units = createQueue(args.queue, args.rules or list(SIMULATIONS), tuple(args.alternatives),
+                                tuple(args.voters), args.num_sims, args.seed, half_width, args.chunk_size,
+                                args.cells_per_unit, args.interval)
+        print("Created", num_units, "units in", args.queue)
+    elif args.command == "work":
+        print("Ran", workQueue(args.queue, args.node, args.max_units), "units")
+    elif args.command == "status":
+        print(", ".join(str(count) + " " + folder for folder, count in queueStatus(args.queue).items()))
+    elif args.command == "requeue":
+        requeued = requeueStale(args.queue, args.stale_seconds)
+        print("Requeued", len(requeued), "units")
+    else:
+        for rule, path in mergeQueue(args.queue, args.output, args.partial).items():
+            print(rule + ":", path)
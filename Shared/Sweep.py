@@ -0,0 +1,182 @@
+# Import dependencies
+import concurrent.futures
+import numpy as np
+
+from Shared.Accumulator import OutcomeAccumulator
+from Shared.Adaptive import ADAPTIVE_BATCH_SIZE, isPreciseEnough
+from Shared.Profiling import PROFILER
+
+
+# Simulations per task, fixed so results do not depend on how many workers run the sweep
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def gridCells(num_alternatives_range, num_voters_range):
+    '''
+    Lists every (num_alternatives, num_voters) cell of a sweep in the order the simulations write them.
+    Example: gridCells((2, 3), (2, 3)) = [(2, 2), (2, 3), (3, 2), (3, 3)].
+    '''
+    return [(num_alternatives, num_voters)
+            for num_alternatives in range(num_alternatives_range[0], num_alternatives_range[1]+1, 1)
+            for num_voters in range(num_voters_range[0], num_voters_range[1]+1, 1)]
+
+
+def voterCells(num_alternatives_range, voters):
+    '''
+    Same as gridCells for a list of numbers of voters rather than a range of them.
+    Example: voterCells((2, 3), [10, 100]) = [(2, 10), (2, 100), (3, 10), (3, 100)].
+    '''
+    return [(num_alternatives, num_voters)
+            for num_alternatives in range(num_alternatives_range[0], num_alternatives_range[1]+1, 1)
+            for num_voters in voters]
+
+
+def cellSeedSequence(seed, num_alternatives, num_voters, chunk=0):
+    '''
+    Returns the random stream of one chunk of one cell. This is the child SeedSequence.spawn would hand out from the
+    root SeedSequence(seed) along the path (num_alternatives, num_voters, chunk), so any chunk of any cell can be
+    recomputed on its own, bit for bit, whatever grid or worker count it was first run with.
+    '''
+    return np.random.SeedSequence(seed, spawn_key=(num_alternatives, num_voters, chunk))
+
+
+def chunkSizes(num_sims, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Splits num_sims into chunks of at most chunk_size simulations. Example: chunkSizes(25, 10) = [10, 10, 5].
+    '''
+    return [min(chunk_size, num_sims - start) for start in range(0, num_sims, chunk_size)]
+
+
+def mergeHistograms(histograms):
+    '''
+    Adds up outcome histograms that may have different lengths, or count tables of any dimension that may have
+    different shapes. Example: mergeHistograms([np.array([1, 2]), np.array([0, 1, 1])]) = [1, 3, 1].
+    OutcomeAccumulators are merged into a new accumulator instead.
+    '''
+    if any(isinstance(histogram, OutcomeAccumulator) for histogram in histograms):
+        merged = OutcomeAccumulator(0)
+        for histogram in histograms:
+            if not isinstance(histogram, OutcomeAccumulator):
+                histogram = OutcomeAccumulator.fromHistogram(histogram)
+            merged.merge(histogram)
+        return merged
+
+    histograms = [np.asarray(histogram) for histogram in histograms]
+    shape = np.max([histogram.shape for histogram in histograms], axis=0)
+    merged = np.zeros(shape, dtype=np.int64)
+    for histogram in histograms:
+        merged[tuple(slice(0, length) for length in histogram.shape)] += histogram
+    return merged
+
+
+def _runChunk(simulateCell, num_sims, num_alternatives, num_voters, seed, chunk, cache=None):
+    '''
+    Runs one chunk of one cell, in a worker process when the sweep uses a pool, or loads it from cache.
+    '''
+    if cache is not None:
+        with PROFILER.phase("cache"):
+            cached = cache.load(num_alternatives, num_voters, seed, chunk, num_sims)
+        if cached is not None:
+            return cached
+
+    rng = np.random.default_rng(cellSeedSequence(seed, num_alternatives, num_voters, chunk))
+    result = simulateCell(num_sims, num_alternatives, num_voters, rng)
+    if cache is not None:
+        with PROFILER.phase("cache"):
+            cache.store(num_alternatives, num_voters, seed, chunk, num_sims, result)
+    return result
+
+
+def _runAdaptiveCell(simulateCell, max_sims, num_alternatives, num_voters, seed, chunk_size, half_width, method,
+                     cache=None):
+    '''
+    Runs chunks of one cell until the interval on its unique winner rate is narrow enough or max_sims is reached.
+    '''
+    histogram = None
+    for chunk, size in enumerate(chunkSizes(max_sims, chunk_size)):
+        result = _runChunk(simulateCell, size, num_alternatives, num_voters, seed, chunk, cache)
+        histogram = result if histogram is None else mergeHistograms([histogram, result])
+        if isPreciseEnough(histogram, half_width, method):
+            break
+    return histogram
+
+
+def _runTask(function, arguments, cell, profile, collect=True):
+    '''
+    Runs one task of a sweep with the profiler of its process set up for cell. Returns the task's result and, when
+    profiling in a worker process, the timings to merge into the profiler of the main process.
+    '''
+    PROFILER.enable(profile)
+    # Phases timed after the task, such as the output of the scripts when workers=1, belong to no cell
+    previous = PROFILER.cell
+    PROFILER.cell = cell
+    try:
+        result = function(*arguments)
+    finally:
+        PROFILER.cell = previous
+    return result, PROFILER.collect() if profile and collect else None
+
+
+def iterSweep(simulateCell, cells, num_sims, seed, workers=None, chunk_size=None, half_width=None, method="wilson",
+              cache=None):
+    '''
+    Runs num_sims simulations of every (num_alternatives, num_voters) cell, split into chunks spread over a pool of
+    worker processes. simulateCell(num_sims, num_alternatives, num_voters, rng) must be a module level function that
+    returns the histogram or OutcomeAccumulator of outcomes of its simulations. Yields (num_alternatives, num_voters, histogram) for each
+    cell as soon as all of its chunks are done. workers=1 runs everything in the current process.
+    With half_width set, each cell instead runs chunks until the method interval on its unique winner rate is at most
+    half_width on either side, with num_sims as a cap. With a ResultCache, chunks it holds are loaded instead of
+    simulated and newly simulated ones are added to it.
+    '''
+    if half_width is None:
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        tasks = [((num_alternatives, num_voters), _runChunk,
+                  (simulateCell, size, num_alternatives, num_voters, seed, chunk, cache))
+                 for num_alternatives, num_voters in cells
+                 for chunk, size in enumerate(chunkSizes(num_sims, chunk_size))]
+    else:
+        chunk_size = chunk_size or ADAPTIVE_BATCH_SIZE
+        tasks = [((num_alternatives, num_voters), _runAdaptiveCell,
+                  (simulateCell, num_sims, num_alternatives, num_voters, seed, chunk_size, half_width, method,
+                   cache))
+                 for num_alternatives, num_voters in cells]
+
+    profile = PROFILER.enabled
+    pending = {cell: 0 for cell, function, arguments in tasks}
+    for cell, function, arguments in tasks:
+        pending[cell] += 1
+    partial = {cell: [] for cell in pending}
+
+    def finish(cell, outcome):
+        histogram, timings = outcome
+        if timings is not None:
+            PROFILER.merge(timings)
+        partial[cell].append(histogram)
+        pending[cell] -= 1
+        if pending[cell] == 0:
+            with PROFILER.phase("merge", cell):
+                return mergeHistograms(partial.pop(cell))
+        return None
+
+    if workers == 1:
+        for cell, function, arguments in tasks:
+            merged = finish(cell, _runTask(function, arguments, cell, profile, collect=False))
+            if merged is not None:
+                yield cell[0], cell[1], merged
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_runTask, function, arguments, cell, profile): cell
+                   for cell, function, arguments in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            cell = futures[future]
+            merged = finish(cell, future.result())
+            if merged is not None:
+                yield cell[0], cell[1], merged
+
+
+def newSeed():
+    '''
+    Draws fresh entropy for a sweep, print it to be able to recompute any cell later.
+    '''
+    return np.random.SeedSequence().entropy
@@ -0,0 +1,126 @@
+# Import dependencies
+import math
+import numpy as np
+
+
+# Largest number of voters computed exactly, each cell loops over the likely numbers of ballots ranking c second, a few
+# dozen times sqrt(num_voters), with vector operations on arrays of up to num_voters entries
+MAX_EXACT_VOTERS = 2 * 10 ** 4
+
+# Probabilities found by inclusion-exclusion are left with rounding error of this order where the outcome cannot occur
+ROUNDING_TOLERANCE = 1e-12
+
+# Numbers of ballots ranking c second less likely than this are skipped, which changes no probability by more than
+# num_voters times it
+NEGLIGIBLE_PROBABILITY = 1e-20
+
+
+# With three alternatives every ballot puts one alternative, say c, first, second or last with probability 1/3 each,
+# and the order of the other two is an independent fair coin. Conditioning on the number M of voters who rank c second
+# splits a profile into independent binomials: M ~ Bin(n, 1/3), and among the other R = n - M voters the number who
+# rank c first and the number who prefer a to b are both Bin(R, 1/2), like the number of the M voters who prefer a to
+# b. The probabilities below sum such binomials over M, O(num_voters ** 2) work instead of enumerating the
+# O(num_voters ** 5) anonymous profiles.
+
+
+def canComputeExact(num_voters, num_alternatives):
+    '''
+    Returns whether the cell has three alternatives and few enough voters for the functions of this module.
+    '''
+    return num_alternatives == 3 and num_voters <= MAX_EXACT_VOTERS
+
+
+def binomialProbabilities(num_trials, log_factorials, probability=0.5):
+    '''
+    Returns the probability of every number of successes from 0 to num_trials, computed from a table of log
+    factorials up to at least num_trials so large num_trials do not overflow.
+    '''
+    successes = np.arange(num_trials + 1)
+    log_probabilities = (log_factorials[num_trials] - log_factorials[successes] - log_factorials[num_trials - successes]
+                         + successes * math.log(probability) + (num_trials - successes) * math.log1p(-probability))
+    return np.exp(log_probabilities)
+
+
+def _logFactorials(num_voters):
+    return np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, num_voters + 1)))))
+
+
+def _outcomeDistribution(probabilities):
+    # Drops the outcomes that cannot occur, like exactDistribution
+    return {outcome: float(probability) for outcome, probability in enumerate(probabilities)
+            if probability > ROUNDING_TOLERANCE}
+
+
+def condorcetDistribution(num_voters):
+    '''
+    Returns the exact impartial culture distribution of the number of weak Condorcet winners of a three alternative
+    profile, the outcome of count_condorcet_winners, as a dictionary like exactDistribution. By symmetry it follows from
+    the probabilities p1, p2 and p3 that a given one, two or three alternatives are all weak Condorcet winners, by
+    inclusion-exclusion. Two or three weak Condorcet winners tie each other exactly, so p2 and p3 are 0 for odd
+    num_voters.
+    '''
+    log_factorials = _logFactorials(num_voters)
+    num_middle = binomialProbabilities(num_voters, log_factorials, 1 / 3)
+    half = num_voters / 2
+    p1 = p2 = p3 = 0.0
+    for middle in np.flatnonzero(num_middle > NEGLIGIBLE_PROBABILITY).tolist():
+        rest = num_voters - middle
+        middle_split = binomialProbabilities(middle, log_factorials)
+        rest_split = binomialProbabilities(rest, log_factorials)
+
+        # a is a weak Condorcet winner when, with a second on middle ballots, first on F of the rest and above b on B of
+        # the middle ballots, |2B - middle| <= 2F - rest
+        margins = 2 * np.arange(rest + 1) - rest
+        cumulative = np.concatenate(([0.0], np.cumsum(middle_split)))
+        high = np.clip(np.floor((middle + margins) / 2).astype(np.int64), -1, middle)
+        low = np.clip(np.ceil((middle - margins) / 2).astype(np.int64), 0, middle + 1)
+        within = np.where(margins >= 0, cumulative[high + 1] - cumulative[np.minimum(low, high + 1)], 0.0)
+        p1 += num_middle[middle] * float(np.dot(rest_split, within))
+
+        if num_voters % 2:
+            continue
+        # a and b are both weak Condorcet winners when, with c second on middle ballots, last on C of the rest, and a
+        # above b on X of the rest and Y of the middle ballots, X + Y = n/2 and C >= n/2 - min(Y, middle - Y)
+        above = np.arange(middle + 1)
+        others = (half - above).astype(np.int64)
+        valid = (others >= 0) & (others <= rest)
+        needed = np.maximum(half - above, half - middle + above).astype(np.int64)
+        survival = np.concatenate((np.cumsum(rest_split[::-1])[::-1], [0.0]))
+        tied = middle_split * np.where(valid, rest_split[np.clip(others, 0, rest)], 0.0)
+        p2 += num_middle[middle] * float(np.dot(tied, survival[np.clip(needed, 0, rest + 1)]))
+
+        # All three tie pairwise only with Y = middle/2 and C = X = rest/2
+        if middle % 2 == 0:
+            p3 += num_middle[middle] * middle_split[middle // 2] * rest_split[rest // 2] ** 2
+
+    return _outcomeDistribution([1 - 3 * p1 + 3 * p2 - p3, 3 * p1 - 6 * p2 + 3 * p3, 3 * p2 - 3 * p3, p3])
+
+
+def bordaDistribution(num_voters):
+    '''
+    Returns the exact impartial culture distribution of the number of tied Borda winners of a three alternative
+    profile, the outcome of count_borda_winners, as a dictionary like exactDistribution. Exactly two alternatives tie at
+    the top with probability 3 (P(a and b tie at the top) - P(all three tie)), and there is a unique winner otherwise.
+    '''
+    log_factorials = _logFactorials(num_voters)
+    num_middle = binomialProbabilities(num_voters, log_factorials, 1 / 3)
+    top_tie = all_tie = 0.0
+    for middle in np.flatnonzero(num_middle > NEGLIGIBLE_PROBABILITY).tolist():
+        rest = num_voters - middle
+        # c's score 2C + middle is at most n, so at most a and b's equal scores, when the number C of the rest ranking
+        # c first is at most rest/2, which needs rest even for a and b to tie
+        if rest % 2:
+            continue
+        middle_split = binomialProbabilities(middle, log_factorials)
+        rest_split = binomialProbabilities(rest, log_factorials)
+
+        # The rest add 2X - rest and the middle ballots 2(2Y - middle) to a's score minus b's, zero when X = rest/2 +
+        # middle - 2Y
+        others = rest // 2 + middle - 2 * np.arange(middle + 1)
+        valid = (others >= 0) & (others <= rest)
+        equal = float(np.dot(middle_split, np.where(valid, rest_split[np.clip(others, 0, rest)], 0.0)))
+
+        top_tie += num_middle[middle] * equal * float(rest_split[:rest // 2 + 1].sum())
+        all_tie += num_middle[middle] * equal * rest_split[rest // 2]
+
+    return _outcomeDistribution([0.0, 1 - 3 * top_tie + 2 * all_tie, 3 * top_tie - 3 * all_tie, all_tie])
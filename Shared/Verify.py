@@ -0,0 +1,191 @@
+# Import dependencies
+import argparse
+import numpy as np
+
+from Shared.Approval import count_approval_winners, unique_approval_winners
+from Shared.Condorcet import count_condorcet_winners, count_condorcet_winners_from_counts, numpyPairwiseMajorities
+from Shared.Coombs import (count_coombs_winners, count_coombs_winners_from_counts, numpyCoombsElimination,
+                           unique_coombs_winners, unique_coombs_winners_from_counts)
+from Shared.InstantRunoff import (count_irv_winners, count_irv_winners_from_counts, numpyIrvWinners, unique_irv_winners,
+                                  unique_irv_winners_from_counts)
+from Shared.Profiling import PROFILER, phase
+from Shared.Profiles import (RankedProfiles, generateApprovalProfiles, generateProfiles, generateRangeProfiles,
+                             toApprovalBallots, toBallots)
+from Shared.RangeVoting import count_range_winners, unique_range_winners
+from Shared.Results import loadSimulation
+from Shared.Scoring import (count_borda_winners, count_borda_winners_from_counts, unique_borda_winners,
+                            unique_borda_winners_from_counts)
+from Shared.Sweep import iterSweep
+
+
+# Default (num_voters, num_alternatives) sizes, with the small and even electorates that tie most often first
+DEFAULT_SIZES = ((1, 2), (2, 2), (3, 2), (4, 2), (2, 3), (3, 3), (4, 3), (6, 3), (4, 4), (8, 4), (7, 5), (10, 5),
+                 (25, 6), (51, 10))
+
+# Kernels on ranking counts are only checked up to this many alternatives, beyond which the counts of every ranking
+# take more memory than the ballots they stand for
+MAX_COUNTS_ALTERNATIVES = 6
+
+# Generator of the batched profiles of every rule
+GENERATORS = {
+    "approval": generateApprovalProfiles,
+    "borda": generateProfiles,
+    "condorcet": generateProfiles,
+    "coombs": generateProfiles,
+    "irv": generateProfiles,
+    "range": generateRangeProfiles,
+}
+
+
+def _rankingCounts(profiles):
+    return RankedProfiles(profiles).rankingCounts()
+
+
+# Every batched kernel, with its rule and a function of (profiles, num_alternatives) returning the outcome the rule's
+# has_* function gives, the number of Condorcet winners or whether there is a unique winner, which the kernels
+# counting tied winners give as one winner
+KERNELS = {
+    "count_condorcet_winners": ("condorcet", lambda profiles, m: count_condorcet_winners(profiles)),
+    "count_condorcet_winners_from_counts": (
+        "condorcet", lambda profiles, m: count_condorcet_winners_from_counts(_rankingCounts(profiles))),
+    "unique_borda_winners": ("borda", lambda profiles, m: unique_borda_winners(profiles)),
+    "unique_borda_winners_from_counts": (
+        "borda", lambda profiles, m: unique_borda_winners_from_counts(_rankingCounts(profiles))),
+    "count_borda_winners": ("borda", lambda profiles, m: count_borda_winners(profiles) == 1),
+    "count_borda_winners_from_counts": (
+        "borda", lambda profiles, m: count_borda_winners_from_counts(_rankingCounts(profiles)) == 1),
+    "unique_irv_winners": ("irv", lambda profiles, m: unique_irv_winners(profiles)),
+    "numpyIrvWinners": ("irv", lambda profiles, m: numpyIrvWinners(profiles) >= 0),
+    "unique_irv_winners_from_counts": (
+        "irv", lambda profiles, m: unique_irv_winners_from_counts(_rankingCounts(profiles))),
+    "count_irv_winners": ("irv", lambda profiles, m: count_irv_winners(profiles) == 1),
+    "count_irv_winners_from_counts": (
+        "irv", lambda profiles, m: count_irv_winners_from_counts(_rankingCounts(profiles)) == 1),
+    "unique_coombs_winners": ("coombs", lambda profiles, m: unique_coombs_winners(profiles)),
+    "numpyCoombsElimination": ("coombs", lambda profiles, m: numpyCoombsElimination(profiles)[0] >= 0),
+    "unique_coombs_winners_from_counts": (
+        "coombs", lambda profiles, m: unique_coombs_winners_from_counts(_rankingCounts(profiles))),
+    "count_coombs_winners": ("coombs", lambda profiles, m: count_coombs_winners(profiles) == 1),
+    "count_coombs_winners_from_counts": (
+        "coombs", lambda profiles, m: count_coombs_winners_from_counts(_rankingCounts(profiles)) == 1),
+    "unique_approval_winners": ("approval", unique_approval_winners),
+    "count_approval_winners": ("approval", lambda profiles, m: count_approval_winners(profiles, m) == 1),
+    "unique_range_winners": ("range", lambda profiles, m: unique_range_winners(profiles)),
+    "count_range_winners": ("range", lambda profiles, m: count_range_winners(profiles) == 1),
+}
+
+
+def referenceOutcomes(rule, profiles, num_alternatives):
+    '''
+    Runs the has_* function of the simulation script of rule on every profile of a batch from the rule's generator, one
+    profile at a time. Returns an int array of the number of Condorcet winners, or of whether there is a unique winner.
+    '''
+    script = loadSimulation(rule)
+    alternatives = script.createAlternatives(num_alternatives)
+    outcomes = []
+    for profile in np.asarray(profiles):
+        if rule == "condorcet":
+            outcomes.append(len(script.has_condorcet_winner(toBallots(profile), alternatives)))
+        elif rule == "borda":
+            outcomes.append(script.has_unique_borda_winner(toBallots(profile)))
+        elif rule == "irv":
+            outcomes.append(script.has_unique_irv_winner(toBallots(profile)))
+        elif rule == "coombs":
+            outcomes.append(script.has_unique_coombs_winner(toBallots(profile)))
+        elif rule == "approval":
+            outcomes.append(script.has_unique_approval_winner(toApprovalBallots(profile), num_alternatives))
+        else:
+            outcomes.append(script.has_unique_range_winner(profile.tolist()))
+    return np.array(outcomes, dtype=np.int64)
+
+
+def verifyKernels(num_sims=200, seed=0, sizes=DEFAULT_SIZES, kernels=None):
+    '''
+    Differential check of the batched kernels against the has_* functions of the simulation scripts: every kernel of
+    KERNELS, or those named in kernels, runs on the same random profiles of every (num_voters, num_alternatives) size
+    as the reference function of its rule. Returns a list of the mismatches, empty when every outcome is identical.
+    '''
+    kernels = {name: KERNELS[name] for name in (kernels if kernels is not None else KERNELS)}
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for num_voters, num_alternatives in sizes:
+        for rule in sorted({rule for rule, kernel in kernels.values()}):
+            profiles = GENERATORS[rule](num_sims, num_voters, num_alternatives, rng)
+            reference = referenceOutcomes(rule, profiles, num_alternatives)
+            for name, (kernel_rule, kernel) in kernels.items():
+                if kernel_rule != rule or name.endswith("_from_counts") and num_alternatives > MAX_COUNTS_ALTERNATIVES:
+                    continue
+                outcomes = np.asarray(kernel(profiles, num_alternatives), dtype=np.int64)
+                if not np.array_equal(outcomes, reference):
+                    mismatches.append((name, num_voters, num_alternatives))
+    return mismatches
+
+
+def verifyCachedPositions(num_sims=200, seed=0, sizes=DEFAULT_SIZES):
+    '''
+    Checks that numpyPairwiseMajorities, given a RankedProfiles, derives the positions through the profiles and caches
+    them there rather than on a converted copy, and that the majorities match those of the plain rankings. Returns a
+    list of the sizes where either fails.
+    '''
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for num_voters, num_alternatives in sizes:
+        profiles = generateProfiles(num_sims, num_voters, num_alternatives, rng)
+        ranked = RankedProfiles(profiles)
+        stored = ranked.nbytes
+        majorities = numpyPairwiseMajorities(ranked)
+        # The cached positions take as many bytes as the rankings
+        if ranked.nbytes != 2 * stored or not np.array_equal(majorities, numpyPairwiseMajorities(profiles)):
+            mismatches.append(("cached positions", num_voters, num_alternatives))
+    return mismatches
+
+
+
+def _profiledCell(num_sims, num_alternatives, num_voters, rng=None):
+    # Module level simulateCell for iterSweep timing one phase
+    with phase("winners"):
+        return count_borda_winners(generateProfiles(num_sims, num_voters, num_alternatives, rng))
+
+
+def verifyProfilerCells(num_sims=200, seed=0, cell=(3, 5)):
+    '''
+    Runs a sweep of one cell in this process with the profiler on, then times an output phase like the scripts do after
+    their sweep. Checks that the sweep's phases are charged to the cell and the output phase to no cell. Returns a list
+    of the mismatches.
+    '''
+    enabled, timings = PROFILER.enabled, PROFILER.timings
+    PROFILER.enable()
+    PROFILER.timings = dict()
+    try:
+        for num_alternatives, num_voters, histogram in iterSweep(_profiledCell, [cell], num_sims, seed, workers=1):
+            pass
+        with phase("output"):
+            pass
+        timed = set(PROFILER.timings)
+    finally:
+        PROFILER.enable(enabled)
+        PROFILER.timings = timings
+    if (cell, "winners") in timed and (None, "output") in timed and (cell, "output") not in timed:
+        return []
+    return [("profiler cells", cell[1], cell[0])]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the batched kernels against the has_* functions of the "
+                                                 "simulation scripts, the reuse of cached positions and the cells of profiled "
+                                                 "phases.")
+    parser.add_argument("--num-sims", type=int, default=200,
+                        help="random profiles per size and rule")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random profiles")
+    parser.add_argument("--kernel", action="append", choices=list(KERNELS), dest="kernels",
+                        help="kernel to check, may be repeated, all of them by default")
+    args = parser.parse_args()
+
+    mismatches = verifyKernels(args.num_sims, args.seed, kernels=args.kernels)
+    mismatches += verifyCachedPositions(args.num_sims, args.seed)
+    mismatches += verifyProfilerCells(args.num_sims, args.seed)
+    for name, num_voters, num_alternatives in mismatches:
+        print("Mismatch:", name, "with", num_voters, "voters and", num_alternatives, "alternatives")
+    print("All outcomes identical" if not mismatches else str(len(mismatches)) + " mismatches")
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,3 @@
+'''
+Code shared by the winner simulations in each voting rule's folder.
+'''